@@ -0,0 +1,60 @@
+# Accuracy and speed report of minibatch training: trains the networks of a
+# ProbRule experiment script one image at a time and with train_batch_size
+# images in lockstep (updates collected over the batch and applied at its
+# end), from the same seed, and compares the accuracies and training times.
+#
+#   python benchmarks/batch_training_report.py "Table1/MNIST Results/prob_meta_mnist_nmem2.py" --batch_sizes 4 16 64
+
+import argparse
+import os.path
+import runpy
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+current_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(current_path, ".."))
+
+import probmeta
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("script", help="experiment script whose config and first parameter set are used")
+	parser.add_argument("--batch_sizes", type=int, nargs="+", default=[4, 16, 64])
+	parser.add_argument("--n_train", type=int, default=6000)
+	parser.add_argument("--n_test", type=int, default=2000)
+	parser.add_argument("--n_runs", type=int, default=3)
+	args = parser.parse_args()
+
+	ns = runpy.run_path(args.script)
+	params = ns['params'][0]
+	config = dict(ns['config'])
+	config.update(n_train=args.n_train, n_test=args.n_test, n_runs=args.n_runs, checkpoint_every=None, result_store=None,
+				  result_dir=tempfile.mkdtemp(), result_name="batch_{train_batch_size}")
+	data = probmeta.data_load(config['load_type'], config['data_dir'], config['data_cache'])
+
+	results = {}
+	seconds = {}
+	for batch_size in [None] + args.batch_sizes:
+		config['train_batch_size'] = batch_size
+		t0 = time.time()
+		results[batch_size] = probmeta.mem_class_train(params, config, data)
+		seconds[batch_size] = time.time() - t0
+
+	ref = results[None]
+	print("{:>10} {:>10} {:>8} {:>10} {:>10} {:>14} {:>12}".format("batch", "time (s)", "speedup", "cont_mean", "cont_std", "max |dAcc|", "mean |dAcc|"))
+	for batch_size, res in results.items():
+		dAcc = np.abs(res['Acc'] - ref['Acc'])
+		print("{:>10} {:>10.1f} {:>8.2f} {:>10.4f} {:>10.4f} {:>14.4f} {:>12.4f}".format(
+			str(batch_size or "sequential"), seconds[batch_size], seconds[None]/seconds[batch_size],
+			res['cont_mean'], res['cont_std'], np.max(dAcc), np.mean(dAcc)))
+	print("final accuracy per task:")
+	for batch_size, res in results.items():
+		print("{:>10} {}".format(str(batch_size or "sequential"), np.round(res['class_cont_Acc'], 4)))
+
+
+if __name__ == '__main__':
+	main()
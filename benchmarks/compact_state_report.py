@@ -0,0 +1,71 @@
+# Accuracy-equivalence report of the compact memristor state: trains the
+# networks of an experiment script with float64 resistances and with the
+# uint8 level + float32 / float16 offset state, from the same seed, and
+# compares the accuracies and the memory held by the synaptic layers.
+#
+#   python benchmarks/compact_state_report.py "Table1/MNIST Results/prob_meta_mnist_nmem2.py" --n_train 6000 --n_runs 3
+
+import argparse
+import os.path
+import runpy
+import sys
+import tempfile
+
+import numpy as np
+
+current_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(current_path, ".."))
+
+import probmeta
+
+
+def state_bytes(config, device, compact_state):
+	"""Bytes held by the state arrays of both synaptic layers"""
+	total = 0
+	for n1, n2, w_max in ((config['n_h1'], config['n_in'], config['w_in_max']), (config['n_out'], config['n_h1'], config['w_out_max'])):
+		if compact_state is None:
+			syn = probmeta.MemristorArray(device['model'], w_max)
+		else:
+			syn = probmeta.CompactMemristorArray(device['model'], w_max, offset_dtype=np.dtype(compact_state))
+		syn.initialize(n1, n2, config['init_bins'])
+		total += sum(getattr(syn, name).nbytes for name in syn.state_names)
+	return total
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("script", help="experiment script whose config and first parameter set are used")
+	parser.add_argument("--n_train", type=int, default=6000)
+	parser.add_argument("--n_test", type=int, default=2000)
+	parser.add_argument("--n_runs", type=int, default=3)
+	args = parser.parse_args()
+
+	ns = runpy.run_path(args.script)
+	params = ns['params'][0]
+	config = dict(ns['config'])
+	config.update(n_train=args.n_train, n_test=args.n_test, n_runs=args.n_runs, checkpoint_every=None,
+				  result_dir=tempfile.mkdtemp(), result_name="compact_state_{compact_state}")
+	config.update(params)
+	probmeta.derive_config(config)
+	device = probmeta.device_setup(config)
+	data = probmeta.data_load(config['load_type'], config['data_dir'], config['data_cache'])
+
+	results = {}
+	for compact_state in (None, "float32", "float16"):
+		config['compact_state'] = compact_state
+		results[compact_state] = probmeta.mem_class_train(params, config, data)
+
+	ref = results[None]
+	print("{:>10} {:>12} {:>10} {:>10} {:>14} {:>12}".format("state", "state (MB)", "cont_mean", "cont_std", "max |dAcc|", "mean |dAcc|"))
+	for compact_state, res in results.items():
+		dAcc = np.abs(res['Acc'] - ref['Acc'])
+		print("{:>10} {:>12.2f} {:>10.4f} {:>10.4f} {:>14.4f} {:>12.4f}".format(
+			str(compact_state or "float64"), state_bytes(config, device, compact_state)/2**20,
+			res['cont_mean'], res['cont_std'], np.max(dAcc), np.mean(dAcc)))
+	print("final accuracy per task:")
+	for compact_state, res in results.items():
+		print("{:>10} {}".format(str(compact_state or "float64"), np.round(res['class_cont_Acc'], 4)))
+
+
+if __name__ == '__main__':
+	main()
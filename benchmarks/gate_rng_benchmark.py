@@ -0,0 +1,49 @@
+# Throughput of the gate variates: the legacy draws from the global numpy
+# random state at every update event against bulk draws from a Philox
+# stream, for every sampling mode, on update events of the size of an
+# error-triggered hidden layer update (n_post hidden neurons by the inputs
+# that spiked).
+#
+#   python benchmarks/gate_rng_benchmark.py --n_post 20 --n_pre 40
+
+import argparse
+import os.path
+import sys
+from time import perf_counter
+
+import numpy as np
+
+current_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(current_path, ".."))
+
+import probmeta
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--n_post", type=int, default=20, help="post-synaptic neurons of an update event")
+	parser.add_argument("--n_pre", type=int, default=40, help="pre-synaptic inputs of an update event")
+	parser.add_argument("--n_events", type=int, default=20000)
+	parser.add_argument("--repeat", type=int, default=3, help="timing rounds, the fastest is kept")
+	args = parser.parse_args()
+
+	np.random.seed(0)
+	print("{:>8} {:>8} {:>14} {:>16}".format("rng", "sampling", "us/event", "variates/s"))
+	for gate_rng in (None, "philox"):
+		for sampling in ("scalar", "row", "synapse"):
+			config = probmeta.default_config(gate_sampling=sampling, gate_rng=gate_rng, seed=0)
+			times = []
+			for r in range(args.repeat):
+				rng = probmeta.run_stream(0, r, 'gate') if gate_rng is not None else None
+				gate = probmeta.GATES['decay'](config, probmeta.GateVariates(rng))
+				t0 = perf_counter()
+				for i in range(args.n_events):
+					gate.draw(args.n_post, args.n_pre)
+				times.append((perf_counter() - t0)/args.n_events)
+			t = min(times)
+			n = {'scalar': 1, 'row': args.n_post, 'synapse': args.n_post*args.n_pre}[sampling]
+			print("{:>8} {:>8} {:>14.2f} {:>16.3g}".format(str(gate_rng), sampling, t*1e6, n/t))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,168 @@
+# Benchmark suite of the simulator kernels and of the training and test
+# throughput, on a synthetic device and synthetic images so that it runs
+# offline. Every kernel is timed for n_in 784 (MNIST) and 512 (CIFAR
+# features), n_h1 200 and 1000 and n_cross 1, 2 and 7. The results can be
+# saved as a baseline and later runs compared against it:
+#
+#   python benchmarks/kernel_benchmark.py --save
+#   python benchmarks/kernel_benchmark.py --compare
+
+import argparse
+import itertools
+import json
+import os.path
+import platform
+import sys
+import tempfile
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+current_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(current_path, ".."))
+
+import probmeta
+
+BASELINE = os.path.join(current_path, "baseline.json")
+N_IN = (784, 512)
+N_H1 = (200, 1000)
+N_CROSS = (1, 2, 7)
+
+
+def synthetic_device(path, n_levels=16):
+	"""Write a device file with n_levels evenly spaced conductance levels and 3% spread"""
+	g = np.linspace(5e-5, 2e-4, n_levels)
+	file_path = os.path.join(path, "synthetic_device.csv")
+	pd.DataFrame({'Resistance_level_mean': 1/g, 'Resistance_level_std': 0.03/g}).to_csv(file_path)
+	return file_path
+
+
+def synthetic_images(n, n_in, density=0.2, seed=0):
+	"""Images in [0, 1] with a fraction density of non-zero pixels, and labels 0/1"""
+	rng = np.random.RandomState(seed)
+	images = rng.rand(n, n_in)*(rng.rand(n, n_in) < density)
+	return images, rng.randint(2, size=n)
+
+
+def best_time(f, repeat, number=1):
+	"""Shortest time of repeat rounds of number calls of f, per call (seconds)"""
+	times = []
+	for i in range(repeat):
+		t0 = perf_counter()
+		for j in range(number):
+			f()
+		times.append((perf_counter() - t0)/number)
+	return min(times)
+
+
+def network(config):
+	"""Initialized layers, feedback weights, metaplasticity, gate and rule of the prob_meta scripts"""
+	device = probmeta.device_setup(config)
+	syn = []
+	for n1, n2, w_max in ((config['n_h1'], config['n_in'], config['w_in_max']), (config['n_out'], config['n_h1'], config['w_out_max'])):
+		s = probmeta.MemristorArray(device['model'], w_max)
+		s.initialize(n1, n2, config['init_bins'])
+		syn.append(s)
+	w_err = (np.random.rand(config['n_h1'], config['n_out'])*2-1)*config['w_err_factor']
+	meta = probmeta.META['individual'](config)
+	gate = probmeta.GATES['meta'](config)
+	rule = probmeta.RULES['prob'](config, syn[0], syn[1], meta, gate)
+	return syn[0], syn[1], w_err, meta, rule
+
+
+def bench_case(device_file, n_in, n_h1, n_cross, n_samples, repeat):
+	"""Time the kernels for one network size
+	:return: list of result dicts
+	"""
+	np.random.seed(0)
+	config = probmeta.default_config(device_file=device_file, n_in=n_in, n_h1=n_h1, n_cross=n_cross)
+	device = probmeta.device_setup(config)
+	mean_res, std_res = device['mean_res'], device['std_res']
+	MaxF, tSim, dt_conv, nBins = config['MaxF'], config['tSim'], config['dt_conv'], config['nBins']
+	images, labels = synthetic_images(max(n_samples, config['test_batch_size']), n_in)
+	size = {'n_in': n_in, 'n_h1': n_h1, 'n_cross': n_cross}
+	results = []
+
+	def add(kernel, seconds, per_sample=False):
+		res = dict(kernel=kernel, **size)
+		res['us_per_call'] = seconds*1e6
+		if per_sample:
+			res['samples_per_s'] = 1/seconds
+			res['us_per_step'] = seconds*1e6/nBins
+		results.append(res)
+
+	w, r = probmeta.weight_initialize_var(n_h1, n_in, device['R_fh'], device['R_bh'], n_cross, mean_res, std_res, config['init_bins'])
+	add("weight_initialize_var", best_time(lambda: probmeta.weight_initialize_var(n_h1, n_in, device['R_fh'], device['R_bh'], n_cross,
+																			 mean_res, std_res, config['init_bins']), repeat))
+	add("res_to_weight", best_time(lambda: probmeta.res_to_weight(r, device['R_fh'], device['R_bh']), repeat))
+
+	# programming of the devices of one error-triggered update: all synapses
+	# of a hidden neuron from the inputs that spiked (about 5% of them)
+	r_up = r[0, :max(1, n_in//20)].ravel()
+	up_dir = np.random.choice([-1.0, 1.0], size=len(r_up))
+	add("res_program", best_time(lambda: probmeta.res_program(r_up, up_dir, mean_res, std_res), repeat, number=100))
+
+	add("MNIST_to_Spikes", best_time(lambda: probmeta.MNIST_to_Spikes(MaxF, images[0], tSim, dt_conv), repeat, number=10), per_sample=True)
+
+	# training samples, including the learning rule and metaplasticity updates
+	syn_in, syn_out, w_err, meta, rule = network(config)
+	state = probmeta.SampleState(config)
+	spikes = [probmeta.MNIST_to_Spikes(MaxF, im, tSim, dt_conv) for im in images[:n_samples]]
+	rule.start_task(0)
+	def train():
+		for u in range(n_samples):
+			probmeta.train_sample(spikes[u], int(labels[u]), syn_in, syn_out, w_err, w_err, rule, meta, config, None, state)
+	train() # allocations of the first samples
+	add("train_sample", best_time(train, repeat)/n_samples, per_sample=True)
+
+	# one test batch, with the spike trains encoded beforehand
+	batch = images[:config['test_batch_size']]
+	test_spikes = probmeta.SpikeCache(MaxF, batch, tSim, dt_conv)
+	add("check_accuracy", best_time(lambda: probmeta.check_accuracy(batch, labels[:len(batch)], syn_in.w, syn_out.w, config, test_spikes),
+									repeat)/len(batch), per_sample=True)
+	return results
+
+
+def compare(results, baseline):
+	"""Print the speed-up of every kernel over the baseline (baseline time / time)"""
+	key = lambda r: (r['kernel'], r['n_in'], r['n_h1'], r['n_cross'])
+	base = {key(r): r for r in baseline['results']}
+	print("{:>22} {:>5} {:>5} {:>7} {:>14} {:>14} {:>8}".format("kernel", "n_in", "n_h1", "n_cross", "baseline (us)", "now (us)", "speedup"))
+	for r in results:
+		b = base.get(key(r))
+		if b is None:
+			continue
+		print("{:>22} {:>5} {:>5} {:>7} {:>14.1f} {:>14.1f} {:>8.2f}".format(*key(r), b['us_per_call'], r['us_per_call'], b['us_per_call']/r['us_per_call']))
+
+
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--n_samples", type=int, default=10, help="training samples timed per size")
+	parser.add_argument("--repeat", type=int, default=3, help="timing rounds, the fastest is kept")
+	parser.add_argument("--save", nargs="?", const=BASELINE, help="write the results as baseline (default benchmarks/baseline.json)")
+	parser.add_argument("--compare", nargs="?", const=BASELINE, help="compare with a saved baseline (default benchmarks/baseline.json)")
+	args = parser.parse_args()
+
+	device_file = synthetic_device(tempfile.mkdtemp())
+	results = []
+	print("{:>22} {:>5} {:>5} {:>7} {:>12} {:>12} {:>12}".format("kernel", "n_in", "n_h1", "n_cross", "us/call", "samples/s", "us/step"))
+	for n_in, n_h1, n_cross in itertools.product(N_IN, N_H1, N_CROSS):
+		for r in bench_case(device_file, n_in, n_h1, n_cross, args.n_samples, args.repeat):
+			results.append(r)
+			print("{:>22} {:>5} {:>5} {:>7} {:>12.1f} {:>12} {:>12}".format(r['kernel'], n_in, n_h1, n_cross, r['us_per_call'],
+				"{:.1f}".format(r['samples_per_s']) if 'samples_per_s' in r else "", "{:.2f}".format(r['us_per_step']) if 'us_per_step' in r else ""))
+
+	if args.compare is not None:
+		with open(args.compare) as f:
+			compare(results, json.load(f))
+
+	if args.save is not None:
+		info = {'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(), 'processor': platform.processor(),
+				'n_samples': args.n_samples, 'repeat': args.repeat}
+		with open(args.save, "w") as f:
+			f.write(json.dumps({'info': info, 'results': results}, indent=4))
+
+
+if __name__ == '__main__':
+	main()
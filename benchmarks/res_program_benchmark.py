@@ -0,0 +1,61 @@
+# Micro-benchmark of memristor programming: level inference with a
+# repmat/argmin matrix and one normal draw per level, against the
+# searchsorted lookup and single vectorized draw used by probmeta
+
+import os.path
+import sys
+import timeit
+
+import numpy as np
+import numpy.matlib
+
+current_path = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(current_path, ".."))
+
+import probmeta
+
+
+def infer_level_argmin(r_up, mean_res):
+	temp_res = np.matlib.repmat(np.reshape(r_up, (len(r_up),1)),1, len(mean_res))
+	diff = abs(temp_res-mean_res)
+	inferred_level = np.argmin(diff, axis =1)
+	return inferred_level
+
+
+def res_program_loop(r, up_dir, mean_res, std_res):
+	r_P = infer_level_argmin(r, mean_res)
+	r_P = r_P + up_dir
+	r_P[np.where(r_P > len(mean_res)-1)] = len(mean_res)-1
+	r_P[np.where(r_P < 0)] = 0
+	r = np.zeros_like(r_P)
+	for i in range(len(mean_res)):
+		loc = np.where(r_P==i)
+		r[loc] = np.random.normal(mean_res[i], std_res[i], len(loc[0]))
+	return r
+
+
+def main():
+	n_levels = 16 # no. of resistance levels of the synthetic device
+	mean_res = 1/np.linspace(5e-5, 2e-4, n_levels)
+	std_res = 0.03*mean_res
+
+	print("{:>8} {:>14} {:>14} {:>8}".format("devices", "loop (us)", "lookup (us)", "speedup"))
+	for n in [10, 100, 1000, 10000, 100000]:
+		lvl = np.random.randint(n_levels, size=n)
+		r = np.random.normal(mean_res[lvl], std_res[lvl])
+		up_dir = np.random.choice([-1.0, 1.0], size=n)
+
+		# both versions give the same resistances for the same seed
+		np.random.seed(0)
+		r_ref = res_program_loop(r, up_dir, mean_res, std_res)
+		np.random.seed(0)
+		assert np.array_equal(r_ref, probmeta.res_program(r, up_dir, mean_res, std_res))
+
+		n_rep = max(10, int(1e5/n))
+		t_loop = timeit.timeit(lambda: res_program_loop(r, up_dir, mean_res, std_res), number=n_rep)/n_rep
+		t_lut = timeit.timeit(lambda: probmeta.res_program(r, up_dir, mean_res, std_res), number=n_rep)/n_rep
+		print("{:>8} {:>14.1f} {:>14.1f} {:>8.1f}".format(n, t_loop*1e6, t_lut*1e6, t_loop/t_lut))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,21 @@
+"""Simulator for continual learning with probabilistic metaplasticity in
+memristive spiking networks, shared by all Table and Figure scripts.
+"""
+
+from .checkpoint import checkpoint_path, save_checkpoint, load_checkpoint, restore_checkpoint
+from .config import default_config, derive_config
+from .data import data_load, cache_dataset, MappedArray
+from .device import (load_device_data, res_states, res_param_config, res_to_weight, conductance_to_weight, weight_initialize_var, INIT_BINS,
+					 infer_level, draw_resistance, res_program, device_setup, feedback_resistances,
+					 DeviceModel, MemristorArray, CompactMemristorArray)
+from .encoding import make_spike_trains, MNIST_to_Spikes, encode_spikes, SpikeCache
+from .experiment import run_seed, make_jobs, merge_runs, run_experiment, main
+from .inference import check_accuracy
+from .profiling import Profiler, profile_path
+from .results import NumpyEncoder, summarize_accuracy, result_file_name, save_results
+from .store import param_hash, ResultWriter, load_results
+from .strategies import META, GATES, RULES, GateVariates
+from .streams import STREAMS, run_stream, RunStreams
+from .sweep import partial_score, run_sweep
+from .tasks import TaskSplit
+from .train import synaptic_input, SampleState, network_step, train_sample, network_step_batch, train_batch, train_run, save_run_results, mem_class_train
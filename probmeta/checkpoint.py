@@ -0,0 +1,110 @@
+# Checkpoints of a training run, to resume it after its worker was stopped
+#
+# A checkpoint is one uncompressed npz file per run with the state arrays
+# of the memristor layers (their state_names), the metaplasticity
+# coefficients, the update counts, the partial Acc matrix and records, the
+# position (task, epoch, next sample) and the state of the global numpy
+# random stream, and of the gate stream and RunStreams if the run has them. Besides the current random state
+# it keeps the states at the start of the run, of the task and of the epoch:
+# train_run replays the draws made there (sample selection, feedback
+# weights, shuffling, spike caches) instead of storing their results, so
+# that a resumed run continues bit-exactly. With RunStreams the states of
+# all streams are kept at the same points, as <key>_streams.
+
+import os
+import os.path
+
+import numpy as np
+
+from .results import result_file_name
+
+RNG_STATES = ('rng_run', 'rng_task', 'rng_epoch', 'rng')
+
+
+def checkpoint_path(config, run):
+	"""File of the checkpoint of one run of a parameter set"""
+	checkpoint_dir = config['checkpoint_dir']
+	if checkpoint_dir is None:
+		checkpoint_dir = os.path.join(config['result_dir'], "checkpoints")
+	name = "{}_ind{}_run{}.npz".format(result_file_name(config), config['ind'], run)
+	return os.path.join(checkpoint_dir, name)
+
+
+def save_checkpoint(path, position, rng_states, syn_in, syn_out, meta, rule, Acc, records, progress, gate=None, stream_states=None):
+	"""Write the state of a run, replacing the previous checkpoint only once complete
+	:param position: (task, epoch, next sample); (n_tasks, 0, 0) once the run is done
+	:param rng_states: dict of np.random.get_state() tuples, keyed by RNG_STATES
+	:param progress: number of time steps shown by the progress bar
+	:param gate: Gate of the rule, whose variates state is kept if they have their own Generator
+	:param stream_states: dict of RunStreams.get_state() arrays keyed by RNG_STATES, or None
+	"""
+	arrays = {'position': np.array(position), 'progress': progress, 'Acc': Acc}
+	for key in RNG_STATES:
+		name, keys, pos, has_gauss, cached_gaussian = rng_states[key]
+		arrays[key + '_keys'] = keys
+		arrays[key + '_pos'] = np.array([pos, has_gauss])
+		arrays[key + '_gauss'] = cached_gaussian
+	for layer, syn in (('in', syn_in), ('out', syn_out)):
+		for name in syn.state_names:
+			arrays[name + '_' + layer] = getattr(syn, name)
+		arrays['cross_ind_' + layer] = syn.cross_ind
+	if meta is not None:
+		arrays['m_in'] = meta.m_in
+		arrays['m_out'] = meta.m_out
+	if rule.c_count is not None:
+		arrays['c_in_count'] = rule.c_count[0]
+		arrays['c_out_count'] = rule.c_count[1]
+	for key, value in records.items():
+		arrays['rec_' + key] = value
+	if gate is not None and gate.variates.rng is not None:
+		arrays.update(gate.variates.get_state())
+	if stream_states:
+		for key in RNG_STATES:
+			arrays[key + '_streams'] = stream_states[key]
+
+	directory = os.path.dirname(path)
+	if directory:
+		os.makedirs(directory, exist_ok=True)
+	tmp_path = path + ".tmp.npz"
+	np.savez(tmp_path, **arrays)
+	os.replace(tmp_path, path)
+
+
+def load_checkpoint(path):
+	"""Read a checkpoint written by save_checkpoint
+	:return: dict of its arrays, with the random states as get_state() tuples, or None if there is none
+	"""
+	if not os.path.exists(path):
+		return None
+	with np.load(path) as f:
+		ckpt = {key: f[key] for key in f.files}
+	for key in RNG_STATES:
+		pos, has_gauss = ckpt.pop(key + '_pos')
+		ckpt[key] = ('MT19937', ckpt.pop(key + '_keys'), int(pos), int(has_gauss), float(ckpt.pop(key + '_gauss')))
+	ckpt['position'] = tuple(int(p) for p in ckpt['position'])
+	ckpt['progress'] = int(ckpt['progress'])
+	return ckpt
+
+
+def restore_checkpoint(ckpt, syn_in, syn_out, meta, rule, Acc, records, gate=None, streams=None):
+	"""Put the state of a checkpoint back into the objects of a run and the global random stream"""
+	for layer, syn in (('in', syn_in), ('out', syn_out)):
+		for name in syn.state_names:
+			setattr(syn, name, ckpt[name + '_' + layer])
+		syn.cross_ind = int(ckpt['cross_ind_' + layer])
+	if meta is not None:
+		# the layer-shared coefficients are scalars
+		meta.m_in = ckpt['m_in'] if ckpt['m_in'].ndim > 0 else ckpt['m_in'].item()
+		meta.m_out = ckpt['m_out'] if ckpt['m_out'].ndim > 0 else ckpt['m_out'].item()
+	if rule.c_count is not None:
+		rule.c_count = [ckpt['c_in_count'], ckpt['c_out_count']]
+	Acc[...] = ckpt['Acc']
+	records.clear()
+	for key, value in ckpt.items():
+		if key.startswith('rec_'):
+			records[key[4:]] = value
+	if gate is not None and gate.variates.rng is not None:
+		gate.variates.set_state(ckpt)
+	if streams is not None:
+		streams.set_state(ckpt['rng_streams'])
+	np.random.set_state(ckpt['rng'])
@@ -0,0 +1,139 @@
+# Default simulation parameters shared by all experiment scripts
+
+import multiprocessing
+
+import numpy as np
+
+
+def default_config(**kwargs):
+	"""Return the split-MNIST parameter set, updated with the given overrides
+	:param kwargs: parameters that differ from the defaults (see the listing below)
+	:return: configuration dict consumed by mem_class_train and check_accuracy
+	"""
+	config = {
+		# device parameters
+		'device_file': "HfOx_device_data_placeholder.csv",
+		'n_cross': 2,
+		'w_in_max': 3,
+		'w_out_max': 1.5,
+		'init_bins': "four_bin", # weight ranges sampled equally at initialization: "four_bin", "two_bin" (see INIT_BINS)
+		                         # or a list of (low, high[, closed_low, closed_high]) ranges
+		'compact_state': None, # None: float64 resistances; "float16" or "float32": uint8 level and offset of every device, float32 weights
+
+		# task parameters
+		'load_type': "mnist",
+		'data_dir': None,
+		'data_cache': None, # None: every worker holds the dataset in memory; a directory: the dataset is converted
+		                    # once into memory-mapped files there, whose pages the workers share
+		'n_train': 60000,
+		'n_test': 10000,
+		'maxE': 1,
+		'n_runs': 5,
+		'n_tasks': 5,
+		'taskID': np.array([[0, 1], [2, 3], [4, 5], [6,7], [8, 9]]), # classes of every task, rows may differ in length
+		'task_labels': "position", # label of a sample within its task: "position" of its class in the taskID row or the "class" itself
+
+		# learning rule parameters
+		'rule': "prob",          # "prob" or "grad_acc"
+		'gate': "meta",          # "meta", "shuffled", "decay" or None
+		'gate_sampling': None,   # gate variates: one per update event ("scalar"), per post-synaptic neuron ("row") or per
+		                         # synapse ("synapse"); None: the gate's default ("scalar" for meta/shuffled, "synapse" for decay)
+		'gate_rng': None,        # None: draw the gate variates from the global numpy random state;
+		                         # "philox": in bulk from the Philox stream of the run (see streams.py)
+		'rng_streams': False,    # draw all random numbers of a run from its own streams, seeded from (seed, run),
+		                         # instead of the global numpy random state (see streams.py)
+		'meta': "individual",    # "individual", "neuron", "layer", "module" or None
+		'defer_updates': False,  # program the memristors once at the end of every sample
+		'reinit_per_task': False, # draw new weights at the start of every task
+		'Imin': -4,
+		'Imax': 4,
+		'lr0': 0.1*7,
+		'lr1': 1e-3*7,
+		'FPF': 1, # inhibits punshing target neuron (only use if training a specific output spike pattern)
+		'U_in': 0.45,
+		'U_out': 3.5,
+		'prob_reduction_factor': 1,
+
+		# simulation parameters
+		'tSim': 0.15, # Duration of simulation (seconds)
+		'MaxF': 250,
+		'maxFL': 100,
+		'dt': 1, # time resolution
+		'dt_conv': 1e-3, # Data is sampled in ms
+		'backend': "numpy", # "numba" runs the time steps of ProbRule training in a compiled kernel
+		'skip_quiescent': False, # advance the network in closed form over steps without input or target spikes in which
+		                         # no neuron can spike (NumPy backend); equal to stepping up to rounding
+		'sparse_density': 0.05, # spike density below which only the weights of the spiking inputs are summed
+		'test_batch_size': 100, # no. of test images simulated together in check_accuracy
+		'train_batch_size': None, # no. of training images simulated together by train_batch, with the updates of the
+		                          # ProbRule collected over the batch and applied at its end; None: one image at a time
+		'spike_cache': None, # None: draw the input spikes of every sample when it is presented,
+		                     # "memory" or a directory: encode every task split once, bit-packed
+
+		# network architecture parameters
+		'n_h1': 200, # no. of hidden neurons
+		'n_in': 28*28, # no. of input neurons
+		'n_out': 2, # no. of output neurons
+
+		# neuron parameters
+		't_syn': 10,
+		't_syn1': 25,
+		't_m': 15,
+		't_mH': 25,
+		't_mU': 15,
+		't_mE': 10,
+		't_tr': 25,
+		'R': 1,
+		'RH': 5,
+		'RU': 5,
+		'RE': 25,
+		'Vs': 15,
+		'VsO': 10,
+		'VsE': 1,
+		'V_rest': 0, # Resting membrane potential
+		't_refr': 4, # Duration of refractory period
+		'w_err_factor': 0.15,
+
+		# metaplasticity parameters
+		'dm_in': 60e-4,
+		'dm_out': 20e-4,
+		'm_th_in': 4,
+		'm_th_hid': 2.25,
+		'm_th_out': 1.75,
+		'm_th_hid1': 2.5,
+		'm_th_hid2': 1.75,
+		'hid_blk_size': 8,
+		'out_blk_size': 4,
+		'm_in_max': 10,
+		'm_out_max': 10,
+
+		# output
+		'result_dir': ".",
+		'result_name': "results",
+		'result_store': "results_store", # directory (in result_dir) that every accuracy is appended to when measured, None: no store
+		'record': (), # any of "m", "weights", "updates"
+		'processes': multiprocessing.cpu_count(),
+		'checkpoint_every': 1000, # samples between two checkpoints of a run (also written after every task), None: no checkpoints
+		'checkpoint_dir': None, # None: "checkpoints" in result_dir
+		'resume': False, # continue every run from its checkpoint, if there is one
+		'profile': False, # time the phases of training and evaluation and count the programming events of every run,
+		                  # written to <result name>_ind<ind>_run<run>_profile.json / .csv in result_dir
+		'split_runs': False, # False: the n_runs of a parameter set run one after the other in one worker, from one random
+		                     # stream seeded with seed, as in the original scripts (the same random stream as the original scripts);
+		                     # True: every (parameter set, run) is a separate job with its own seed run_seed(seed, run),
+		                     # spread over all workers, with different results (see --split-runs)
+	}
+	config.update(kwargs)
+	return derive_config(config)
+
+
+def derive_config(config):
+	"""Recompute the parameters that follow from the others
+	:param config: configuration dict, updated in place
+	:return: the same dict
+	"""
+	config['nBins'] = int(config['tSim']/config['dt_conv']) # total no. of time steps
+	config['Vth'] = (1/config['t_m'])*config['R']*config['Vs'] # Hidden neuron threshold
+	config['VthO'] = (1/config['t_mH'])*config['RH']*config['VsO'] # Output neuron threshold
+	config['VthE'] = (1/config['t_mE'])*config['RE']*config['VsE'] # Error neuron threshold
+	return config
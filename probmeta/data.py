@@ -0,0 +1,156 @@
+# Dataset loading for the split-task experiments
+#
+# With a cache directory, every dataset is converted once into .npy files:
+# the raw images (uint8 for pixel data, float32 for the CIFAR features),
+# the labels and the divisions that scale the images to [0, 1]. The files are opened with
+# np.load(mmap_mode='r'), so that the worker processes share their pages
+# instead of holding one copy of the dataset each; the images are scaled
+# when a subset of them is taken.
+
+import os
+import os.path
+
+import numpy as np
+
+SPLITS = ("train", "test")
+
+
+def _read(load_type, data_dir):
+	"""Read the flattened, unscaled images and the labels of a dataset"""
+	if data_dir is None:
+		data_dir = ""
+
+	if load_type == "p_mnist":
+		from mnist.loader import MNIST
+
+		loader = MNIST(os.path.join(data_dir, 'MNIST')) # replace with your MNIST path
+		TrainIm_, TrainL_ = loader.load_training()
+		TestIm_, TestL_ = loader.load_testing()
+
+	elif load_type == "mnist":
+		import mnist
+
+		TrainIm_ = mnist.train_images()
+		TrainL_ = mnist.train_labels()
+		TestIm_ = mnist.test_images()
+		TestL_ = mnist.test_labels()
+
+		TrainIm_ = np.reshape(TrainIm_, [TrainIm_.shape[0],TrainIm_.shape[1]*TrainIm_.shape[2]])
+		TestIm_ = np.reshape(TestIm_,[TestIm_.shape[0],TestIm_.shape[1]*TestIm_.shape[2]])
+
+	elif load_type in ("k_mnist", "fmnist"):
+		import keras
+
+		if load_type == "k_mnist":
+			((X_train, TrainL_), (X_test, TestL_)) = keras.datasets.mnist.load_data()
+		else:
+			((X_train, TrainL_), (X_test, TestL_)) = keras.datasets.fashion_mnist.load_data()
+		TrainIm_= np.reshape(X_train, [X_train.shape[0],X_train.shape[1]*X_train.shape[2]])
+		TestIm_ = np.reshape(X_test, [X_test.shape[0],X_test.shape[1]*X_test.shape[2]])
+
+	elif load_type == "cifar_features":
+		# ResNet18 features of the CIFAR10 images, already scaled
+		TrainIm_ = np.load(os.path.join(data_dir, "Resnet18_FE_Train_Data_Scaled.npy"))
+		TestIm_ = np.load(os.path.join(data_dir, "Resnet18_FE_Test_Data_Scaled.npy"))
+		TrainL_ = np.load(os.path.join(data_dir, "Resnet18_FE_Train_Labels.npy"))
+		TestL_ = np.load(os.path.join(data_dir, "Resnet18_FE_Test_Labels.npy"))
+
+	else:
+		raise ValueError("unknown load_type {}".format(load_type))
+
+	return np.array(TrainIm_), np.array(TrainL_), np.array(TestIm_), np.array(TestL_)
+
+
+def _divisors(load_type, images):
+	"""Divisions that scale the raw images of a dataset to [0, 1], in order"""
+	divisors = []
+	if load_type in ("k_mnist", "fmnist"):
+		divisors.append(255.0)
+	if load_type != "fmnist": # fmnist is already divided by 255
+		divisors.append(float(_scale(images, divisors).max())) # scale to [0, 1] interval
+	return np.array(divisors)
+
+
+def _scale(images, divisors):
+	for d in divisors:
+		images = images / d
+	return images
+
+
+def data_load(load_type, data_dir=None, cache_dir=None):
+	"""Load a dataset as flattened images scaled to [0, 1] and labels
+	:param load_type: "mnist", "p_mnist", "k_mnist", "fmnist" or "cifar_features"
+	:param data_dir: directory of the MNIST files ("p_mnist") or ResNet18 features ("cifar_features")
+	:param cache_dir: None to read the dataset into memory, or the directory of the
+		memory-mapped cache (see cache_dataset)
+	:return: TrainIm_, TrainL_, TestIm_, TestL_
+	"""
+	if cache_dir is not None:
+		path = cache_dataset(load_type, data_dir, cache_dir)
+		data = []
+		for split in SPLITS:
+			data.append(MappedArray(os.path.join(path, split + "_images.npy"), np.load(os.path.join(path, split + "_divisors.npy"))))
+			data.append(MappedArray(os.path.join(path, split + "_labels.npy")))
+		return tuple(data)
+
+	TrainIm_, TrainL_, TestIm_, TestL_ = _read(load_type, data_dir)
+	TrainIm_ = _scale(TrainIm_, _divisors(load_type, TrainIm_))
+	TestIm_ = _scale(TestIm_, _divisors(load_type, TestIm_))
+	return TrainIm_, TrainL_, TestIm_, TestL_
+
+
+def cache_dataset(load_type, data_dir, cache_dir):
+	"""Convert a dataset into the cache, unless it is there already
+	Pixel images are kept as uint8 and scaled exactly as by data_load; the CIFAR
+	features are stored as float32.
+	:return: directory of the dataset in the cache
+	"""
+	path = os.path.join(cache_dir, load_type)
+	if os.path.exists(os.path.join(path, "test_divisors.npy")): # written last
+		return path
+
+	os.makedirs(path, exist_ok=True)
+	TrainIm_, TrainL_, TestIm_, TestL_ = _read(load_type, data_dir)
+	for split, images, labels in (("train", TrainIm_, TrainL_), ("test", TestIm_, TestL_)):
+		divisors = _divisors(load_type, images)
+		if np.issubdtype(images.dtype, np.integer) and images.min() >= 0 and images.max() <= 255:
+			images = images.astype(np.uint8)
+		else:
+			images = images.astype(np.float32)
+		_save(os.path.join(path, split + "_images.npy"), images)
+		_save(os.path.join(path, split + "_labels.npy"), labels)
+		_save(os.path.join(path, split + "_divisors.npy"), divisors)
+	return path
+
+
+def _save(file_path, a):
+	tmp_path = file_path + ".tmp.npy"
+	np.save(tmp_path, a)
+	os.replace(tmp_path, file_path)
+
+
+class MappedArray:
+	""" Read-only array of a .npy file, opened with mmap_mode='r' in every process
+	that uses it (pickling only sends the file name). Indexing returns the rows
+	divided by the divisors in turn, as an ordinary array.
+	"""
+	def __init__(self, file_path, divisors=()):
+		self.file_path = file_path
+		self.divisors = divisors
+		self.array = np.load(file_path, mmap_mode='r')
+
+	def __getstate__(self):
+		return {'file_path': self.file_path, 'divisors': self.divisors}
+
+	def __setstate__(self, state):
+		self.__init__(state['file_path'], state['divisors'])
+
+	def __len__(self):
+		return len(self.array)
+
+	@property
+	def shape(self):
+		return self.array.shape
+
+	def __getitem__(self, ind):
+		return _scale(np.asarray(self.array[ind]), self.divisors)
@@ -0,0 +1,298 @@
+# Memristor device model: resistance states, programming and weight mapping
+
+import os.path
+
+import numpy as np
+import pandas as pd
+
+
+def load_device_data(file_path):
+	"""Read the mean and standard deviation of every resistance level
+	:param file_path: csv file with Resistance_level_mean and Resistance_level_std columns
+	:return: mean_res, std_res
+	"""
+	# The device data has been collected from Liehr, Maximilian, et al. "Impact of switching variability of 65nm CMOS integrated hafnium
+	# dioxide-based ReRAM devices on distinct level operations." 2020 IEEE International Integrated Reliability Workshop (IIRW). IEEE, 2020.
+	memristor_data = pd.read_csv(file_path)
+	mean_res = np.array(memristor_data["Resistance_level_mean"])
+	std_res = np.array(memristor_data["Resistance_level_std"])
+	return mean_res, std_res
+
+
+def res_states(mean_res, n_cross):
+	"""List every state of n_cross parallel devices, from all devices at the
+	first level to all devices at the last level
+	:return: states (resistances), statesP (level indices)
+	"""
+	# state k = i*n_cross + j has its last j devices at level i+1 and the others at level i
+	k = np.arange((len(mean_res)-1)*n_cross + 1)
+	i, j = np.divmod(k, n_cross)
+	statesP = i[:, None] + (np.arange(n_cross) >= n_cross - j[:, None])
+	return mean_res[statesP], statesP.astype(float)
+
+
+def res_param_config(mean_res, std_res, n_cross, w_hid_max, w_out_max):
+	"""Compute the feedback and bias resistances that map the device states
+	onto [-w_max, w_max]
+	:return: R_fh, R_bh, R_fo, R_bo
+	"""
+	states, _ = res_states(mean_res, n_cross)
+	g_states = np.sum(1/states, axis = 1)
+	R_fh, R_bh = feedback_resistances(g_states, w_hid_max)
+	R_fo, R_bo = feedback_resistances(g_states, w_out_max)
+	return R_fh, R_bh, R_fo, R_bo
+
+
+def feedback_resistances(g_states, w_max):
+	"""Feedback and bias resistances that map the lowest and highest state
+	conductance g_states[0], g_states[-1] onto -w_max and w_max
+	:return: R_f, R_b
+	"""
+	# calculate the parallel equivalent resistance
+	p = 1/g_states
+
+	# compute the feedback and bias resistance for given weight range
+	b = np.array([[w_max], [-w_max]])
+	A = np.array([[1/p[len(p)-1], -1], [1/p[0], -1]])
+	x = np.matmul(np.linalg.inv(A), b)
+
+	R_f = x[0][0]
+	R_b = R_f/x[1][0]
+	return R_f, R_b
+
+
+def res_to_weight(r, R_f, R_b):
+	max_axis = len(r.shape)-1
+	return conductance_to_weight(np.sum(1/r, axis = max_axis), R_f, R_b)
+
+
+def conductance_to_weight(g, R_f, R_b):
+	"""Weight of a synapse whose parallel devices have total conductance g"""
+	r_tot = 1/g
+	weight = R_f/r_tot - R_f/R_b
+	return weight
+
+
+# weight-range policies of the initialization, by name: the four quarters of
+# [-1, 1] (MNIST) or its two halves (Fashion-MNIST), as (low, high, closed_low,
+# closed_high), with the edges of the original scripts: the outer bins are
+# closed, and -0.5 belongs to both the first and the second quarter
+INIT_BINS = {'four_bin': [(-1, -0.5, True, True), (-0.5, 0, True, False), (0, 0.5, True, False), (0.5, 1, True, True)],
+			 'two_bin': [(-1, 0, True, False), (0, 1, True, True)]}
+
+
+def weight_initialize_var(n1, n2, R_f, R_b, n_cross, mean_res, std_res, init_bins, states=None, rng=np.random):
+	"""Draw an n1 x n2 crossbar whose weights are spread equally over init_bins
+	Every bin gets n1*n2/len(init_bins) synapses, each in a state drawn uniformly
+	from the states whose nominal weight lies in the bin; the synapses are then
+	shuffled and the resistances of all devices drawn at once (see draw_resistance).
+	:param init_bins: list of weight ranges, either (low, high) for low <= w < high or
+		(low, high, closed_low, closed_high), or the name of one of INIT_BINS
+	:param states: (states, statesP) as returned by res_states, computed here if None
+	:param rng: np.random (the global random state) or a numpy Generator
+	:return: w, r
+	"""
+	states, statesP = res_states(mean_res, n_cross) if states is None else states
+	if isinstance(init_bins, str):
+		init_bins = INIT_BINS[init_bins]
+	w_list = res_to_weight(states, R_f, R_b)
+	n_tot = n1*n2
+	n_bins = len(init_bins)
+	if n_tot%n_bins != 0:
+		raise ValueError("{} synapses cannot be spread equally over {} init_bins".format(n_tot, n_bins))
+
+	# states in every bin, [bin, state]
+	bins = [tuple(b) if len(b) == 4 else (b[0], b[1], True, False) for b in init_bins]
+	w_lo, w_hi, closed_lo, closed_hi = (np.array(c)[:, None] for c in zip(*bins))
+	in_bin = np.where(closed_lo, w_list >= w_lo, w_list > w_lo) & np.where(closed_hi, w_list <= w_hi, w_list < w_hi)
+	bin_size = np.count_nonzero(in_bin, axis=1)
+	if np.any(bin_size == 0):
+		raise ValueError("no state has a weight in the init_bins {}".format([init_bins[k] for k in np.flatnonzero(bin_size == 0)]))
+
+	# one uniform draw per synapse among the states of its bin, then a shuffle
+	ind = np.concatenate([rng.choice(np.flatnonzero(in_bin[k]), n_tot//n_bins) for k in range(n_bins)])
+	ind_rand = ind[rng.permutation(n_tot)]
+	r = draw_resistance(statesP.astype(np.int16)[ind_rand], mean_res, std_res, rng)
+	r = np.reshape(r, [n1, n2, n_cross])
+	w = res_to_weight(r, R_f, R_b)
+	return w, r
+
+
+def infer_level(r_up, mean_res):
+	"""Index of the level in mean_res closest to each resistance in r_up
+	mean_res is sorted (in either direction), so the level follows from the
+	position of r_up among the midpoints between neighbouring levels
+	"""
+	if mean_res[0] <= mean_res[-1]:
+		mid = (mean_res[1:] + mean_res[:-1])/2
+		return np.searchsorted(mid, r_up, side='left')
+	mid = (mean_res[-1:0:-1] + mean_res[-2::-1])/2
+	return len(mean_res)-1 - np.searchsorted(mid, r_up, side='right')
+
+
+def draw_resistance(levels, mean_res, std_res, rng=np.random):
+	"""Draw a resistance for every device from the distribution of its level
+	The random numbers are used level by level, in the order of np.where, as
+	with one np.random.normal call per level
+	:param rng: np.random (the global random state) or a numpy Generator
+	"""
+	levels = np.asarray(levels)
+	lvl = levels.astype(np.int16, copy=False).ravel() # stable argsort of 16-bit integers is a radix sort
+	order = np.argsort(lvl, kind='stable')
+	n_level = np.bincount(lvl, minlength=len(mean_res)) # the sorted levels are n_level[0] zeros, n_level[1] ones, ...
+	r = np.empty(len(lvl))
+	r[order] = np.repeat(mean_res, n_level) + np.repeat(std_res, n_level)*rng.standard_normal(len(lvl))
+	return np.reshape(r, levels.shape)
+
+
+def res_program(r, up_dir, mean_res, std_res, rng=np.random):
+	"""Move every device up_dir levels from its current level and draw its new resistance"""
+	r_P = infer_level(r, mean_res)
+	r_P = r_P + up_dir
+	np.clip(r_P, 0, len(mean_res)-1, out=r_P)
+	return draw_resistance(r_P, mean_res, std_res, rng)
+
+
+def device_setup(config):
+	"""Load the device data and derive the crossbar parameters for a configuration
+	:return: dict with the DeviceModel (model), mean_res, std_res, n_res_level and the R_fh, R_bh, R_fo, R_bo resistances
+	"""
+	model = DeviceModel.from_file(config['device_file'], config['n_cross'])
+	R_fh, R_bh = model.feedback(config['w_in_max'])
+	R_fo, R_bo = model.feedback(config['w_out_max'])
+	return {'model': model, 'mean_res': model.mean_res, 'std_res': model.std_res, 'n_res_level': model.n_res_level,
+			'R_fh': R_fh, 'R_bh': R_bh, 'R_fo': R_fo, 'R_bo': R_bo}
+
+
+_models = {} # DeviceModel of every (device file, n_cross) loaded in this process
+
+
+class DeviceModel:
+	""" Resistance levels of a memristor technology (mean and standard deviation
+	of every level) and the table of the states of n_cross parallel devices, with
+	their total conductances. from_file builds the model of a device file once per
+	process, so that all runs and layers share it; a model pickles with its tables.
+	"""
+	def __init__(self, mean_res, std_res, n_cross):
+		self.mean_res = np.asarray(mean_res, dtype=float)
+		self.std_res = np.asarray(std_res, dtype=float)
+		self.n_cross = n_cross
+		self.n_res_level = len(self.mean_res)
+		self.states, self.statesP = res_states(self.mean_res, n_cross)
+		self.g_states = np.sum(1/self.states, axis=1)
+		self._feedback = {}
+
+	@classmethod
+	def from_file(cls, file_path, n_cross):
+		"""Model of a csv file with Resistance_level_mean and Resistance_level_std columns"""
+		key = (os.path.abspath(file_path), n_cross)
+		if key not in _models:
+			_models[key] = cls(*load_device_data(file_path), n_cross)
+		return _models[key]
+
+	def feedback(self, w_max):
+		"""Feedback and bias resistances R_f, R_b that map the states onto [-w_max, w_max]"""
+		if w_max not in self._feedback:
+			self._feedback[w_max] = feedback_resistances(self.g_states, w_max)
+		return self._feedback[w_max]
+
+	def state_weights(self, R_f, R_b):
+		"""Nominal weight of every state"""
+		return conductance_to_weight(self.g_states, R_f, R_b)
+
+	def initialize(self, n1, n2, R_f, R_b, init_bins, rng=np.random):
+		"""weight_initialize_var with the state table of the model"""
+		return weight_initialize_var(n1, n2, R_f, R_b, self.n_cross, self.mean_res, self.std_res, init_bins, (self.states, self.statesP), rng)
+
+	def draw(self, levels, rng=np.random):
+		"""Resistances of devices at the given levels, see draw_resistance"""
+		return draw_resistance(levels, self.mean_res, self.std_res, rng)
+
+	def program(self, r, up_dir, rng=np.random):
+		"""New resistances of devices moved up_dir levels, see res_program"""
+		return res_program(r, up_dir, self.mean_res, self.std_res, rng)
+
+
+class MemristorArray:
+	""" Synaptic layer in which every weight is set by n_cross parallel memristors.
+	Each programming event writes to one device per synapse, cycling through the
+	n_cross devices; cross_offset selects the device used by the first event.
+	The total conductance g of every synapse is kept, and recomputed from its
+	n_cross devices when it is programmed, and w is derived from it.
+	"""
+	state_names = ('w', 'r', 'g') # arrays that hold the state of the layer, besides cross_ind
+
+	def __init__(self, model, w_max, cross_offset=1, rng=np.random):
+		"""
+		:param model: DeviceModel of the devices
+		:param w_max: the states of the synapses are mapped onto [-w_max, w_max]
+		:param rng: source of the device variability, np.random (the global random state) or a numpy Generator
+		"""
+		self.model = model
+		self.rng = rng
+		self.R_f, self.R_b = model.feedback(w_max)
+		self.n_cross = model.n_cross
+		self.mean_res = model.mean_res
+		self.std_res = model.std_res
+		self.cross_ind = cross_offset
+		self.w = None
+		self.r = None
+		self.g = None
+
+	def initialize(self, n1, n2, init_bins):
+		self.w, self.r = self.model.initialize(n1, n2, self.R_f, self.R_b, init_bins, self.rng)
+		self.g = np.sum(1/self.r, axis=2)
+
+	def program(self, up, c_up):
+		"""Move the current device of the synapses up = (rows, cols) by c_up levels"""
+		current_ind = int(self.cross_ind%self.n_cross)
+		self.cross_ind = self.cross_ind+1
+		r_up = self.r[up[0], up[1], current_ind]
+		r_new = self.model.program(r_up, c_up, self.rng)
+		self.r[up[0], up[1], current_ind] = r_new
+		self.g[up] = np.sum(1/self.r[up], axis=1) # summed afresh, as in res_to_weight, so no rounding error builds up
+		self.w[up] = conductance_to_weight(self.g[up], self.R_f, self.R_b)
+
+
+class CompactMemristorArray(MemristorArray):
+	""" MemristorArray that stores every device as the uint8 index of its nearest
+	level and a float16 (or float32) offset from the level mean, in units of the
+	level standard deviation. The weights are kept in float32; the resistances
+	and conductances of a synapse are rebuilt from its devices when it is
+	programmed. Programming draws the same random numbers as MemristorArray.
+	"""
+	state_names = ('w', 'level', 'offset')
+
+	def __init__(self, model, w_max, cross_offset=1, offset_dtype=np.float16, rng=np.random):
+		super().__init__(model, w_max, cross_offset, rng)
+		if model.n_res_level > 256:
+			raise ValueError("the compact state holds at most 256 resistance levels, got {}".format(model.n_res_level))
+		self.offset_dtype = offset_dtype
+		self.level = None
+		self.offset = None
+
+	def encode(self, r):
+		"""Level indices and offsets of the resistances r"""
+		level = infer_level(r, self.mean_res)
+		offset = (r - self.mean_res[level])/self.std_res[level]
+		return level.astype(np.uint8), offset.astype(self.offset_dtype)
+
+	def resistance(self, level, offset):
+		return self.mean_res[level] + self.std_res[level]*offset
+
+	def initialize(self, n1, n2, init_bins):
+		w, r = self.model.initialize(n1, n2, self.R_f, self.R_b, init_bins, self.rng)
+		self.level, self.offset = self.encode(r)
+		g = np.sum(1/self.resistance(self.level, self.offset), axis=2)
+		self.w = conductance_to_weight(g, self.R_f, self.R_b).astype(np.float32)
+
+	def program(self, up, c_up):
+		"""Move the current device of the synapses up = (rows, cols) by c_up levels"""
+		current_ind = int(self.cross_ind%self.n_cross)
+		self.cross_ind = self.cross_ind+1
+		r_P = self.level[up[0], up[1], current_ind] + c_up
+		np.clip(r_P, 0, len(self.mean_res)-1, out=r_P)
+		r_new = self.model.draw(r_P, self.rng)
+		self.level[up[0], up[1], current_ind], self.offset[up[0], up[1], current_ind] = self.encode(r_new)
+		g = np.sum(1/self.resistance(self.level[up], self.offset[up]), axis=1)
+		self.w[up] = conductance_to_weight(g, self.R_f, self.R_b)
@@ -0,0 +1,82 @@
+# Poisson spike encoding of the input images and target labels
+#
+# The random numbers are drawn from rng: the global numpy random state
+# (np.random, the default) or a numpy Generator (see streams.py).
+
+import tempfile
+
+import numpy as np
+
+
+def make_spike_trains(freqs, n_steps, rng=np.random):
+	''' Create an array of Poisson spike trains
+		Parameters:
+			freqs: Array of mean spiking frequencies.
+			n_steps: Number of time steps
+			rng: np.random or a numpy Generator
+	'''
+	r = rng.random((len(freqs), n_steps))
+	spike_trains = np.where(r <= np.reshape(freqs, (len(freqs),1)), 1, 0)
+	return spike_trains
+
+
+def MNIST_to_Spikes(maxF, im, t_sim, dt, rng=np.random):
+	''' Generate spike train array from MNIST image.
+		Parameters:
+			maxF: max frequency, corresponding to 1.0 pixel value
+			FR: MNIST image (784,)
+			t_sim: duration of sample presentation (seconds)
+			dt: simulation time step (seconds)
+			rng: np.random or a numpy Generator
+	'''
+	n_steps = int(t_sim / dt) #  sample presentation duration in sim steps
+	freqs = im * maxF * dt # scale [0,1] pixel values to [0,maxF] and flatten
+	SpikeMat = make_spike_trains(freqs, n_steps, rng)
+	return SpikeMat
+
+
+def encode_spikes(maxF, images, t_sim, dt, rng=np.random):
+	''' Generate the spike train arrays of a set of images in one call.
+		The random numbers are drawn in the same order as calling
+		MNIST_to_Spikes on one image after the other.
+		Parameters:
+			maxF: max frequency, corresponding to 1.0 pixel value
+			images: images (n_images, n_in)
+			t_sim: duration of sample presentation (seconds)
+			dt: simulation time step (seconds)
+			rng: np.random or a numpy Generator
+		Returns a boolean array (n_images, n_in, n_steps)
+	'''
+	n_steps = int(t_sim / dt)
+	freqs = images * maxF * dt
+	r = rng.random((len(images), images.shape[1], n_steps))
+	return r <= freqs[:, :, np.newaxis]
+
+
+class SpikeCache:
+	''' Spike trains of a set of images, encoded once and stored bit-packed
+		along the time axis (n_steps bits per input neuron).
+		Parameters:
+			maxF, images, t_sim, dt, rng: as in encode_spikes
+			path: None to keep the spikes in memory, or a directory in which
+				they are kept in a memory-mapped temporary file
+			chunk_size: no. of images encoded per call
+	'''
+	def __init__(self, maxF, images, t_sim, dt, path=None, chunk_size=100, rng=np.random):
+		self.n_steps = int(t_sim / dt)
+		shape = (len(images), images.shape[1], (self.n_steps + 7)//8)
+		if path is None:
+			self.packed = np.empty(shape, dtype=np.uint8)
+		else:
+			self.packed = np.memmap(tempfile.TemporaryFile(dir=path), dtype=np.uint8, mode='w+', shape=shape)
+		for b in range(0, len(images), chunk_size):
+			self.packed[b:b+chunk_size] = np.packbits(encode_spikes(maxF, images[b:b+chunk_size], t_sim, dt, rng), axis=-1)
+
+	def __len__(self):
+		return len(self.packed)
+
+	def __getitem__(self, ind):
+		''' Spike trains of image ind (n_in, n_steps), or (n, n_in, n_steps)
+			for a slice, as 0/1 uint8
+		'''
+		return np.unpackbits(self.packed[ind], axis=-1, count=self.n_steps)
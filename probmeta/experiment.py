@@ -0,0 +1,130 @@
+# Running a list of parameter sets in worker processes
+#
+# By default every worker trains the n_runs of one parameter set from one
+# random stream, as the original scripts did. With split_runs (--split-runs)
+# every (parameter set, run) pair is an independent job seeded from
+# (seed, run), so that all runs of all parameter sets are spread over the
+# worker processes; the runs then draw other random numbers than the original
+# scripts. The Acc slices of the runs are merged into one results json per
+# parameter set, as written by mem_class_train. With rng_streams a run draws from its own
+# streams (see streams.py) and gives the same results with and without
+# split_runs.
+
+import argparse
+from multiprocessing import Pool, RLock
+
+import numpy as np
+from tqdm import tqdm
+
+from .config import derive_config
+from .data import data_load
+from .device import device_setup
+from .store import ResultWriter, store_path
+from .train import mem_class_train, train_run, save_run_results
+
+_config = None
+_data = None
+
+
+def _init_worker(lock, config, data):
+	global _config, _data
+	tqdm.set_lock(lock)
+	_config = config
+	_data = data
+
+
+def _train_worker(params):
+	return mem_class_train(params, _config, _data)
+
+
+def run_seed(seed, run):
+	"""Seed of one run, derived from the seed of the parameter set"""
+	return int(np.random.SeedSequence([seed, run]).generate_state(1)[0])
+
+
+def job_config(config, params):
+	"""Configuration of the runs of one parameter set"""
+	config = dict(config)
+	config.update(params)
+	return derive_config(config)
+
+
+def make_jobs(config, params):
+	"""List the (parameter set index, run, position) jobs of all parameter sets"""
+	jobs = []
+	for i, p in enumerate(params):
+		for run in range(job_config(config, p)['n_runs']):
+			jobs.append((i, run, len(jobs)))
+	return jobs
+
+
+def _run_job(args):
+	params, run, position, stop_task, resume = args
+	config = job_config(_config, params)
+	config['resume'] = resume
+	device = device_setup(config)
+	np.random.seed(run_seed(config['seed'], run))
+	writer = ResultWriter(store_path(config), params, config, run) if config['result_store'] is not None else None
+	Acc, records = train_run(run, config, _data, device, position, writer, stop_task)
+	return Acc, records
+
+
+def merge_runs(config, params, outputs):
+	"""Combine the outputs of the runs of one parameter set and write its results
+	:param outputs: (Acc, records) of every run, in run order
+	:return: results dict
+	"""
+	config = job_config(config, params)
+	Acc = np.stack([acc for acc, records in outputs], axis=2)
+	records = {}
+	for acc, run_records in outputs:
+		records.update(run_records)
+	return save_run_results(params, config, Acc, records)
+
+
+def run_experiment(config, params):
+	"""Load the dataset once and train the networks of every entry of params
+	:param config: simulation parameters, see default_config
+	:param params: list of per-run parameter dicts, each with 'ind' and 'seed'
+	:return: list of results dicts
+	"""
+	data = data_load(config['load_type'], config['data_dir'], config['data_cache'])
+	jobs = make_jobs(config, params) if config['split_runs'] else params
+
+	tqdm.set_lock(RLock())
+	p = Pool(initializer=_init_worker, initargs=(tqdm.get_lock(), config, data), processes = min(config['processes'], len(jobs)))
+	if config['split_runs']:
+		outputs = p.map(_run_job, [(params[i], run, position, None, config['resume']) for i, run, position in jobs])
+		results = []
+		for i in range(len(params)):
+			results.append(merge_runs(config, params[i], [out for (j, run, position), out in zip(jobs, outputs) if j == i]))
+	else:
+		results = p.map(_train_worker, params)
+	p.close()
+	p.join()
+	return results
+
+
+def main(config, params, argv=None):
+	"""Command line entry point of the experiment scripts
+	--resume continues every run from its last checkpoint, --split-runs runs
+	every run as its own job, --sweep runs the parameter sets as a successive
+	halving sweep (see sweep.py)
+	"""
+	parser = argparse.ArgumentParser()
+	parser.add_argument("--resume", action="store_true", help="continue the runs from their last checkpoints")
+	parser.add_argument("--split-runs", action="store_true", help="run every (parameter set, run) as its own job, with its own seed")
+	parser.add_argument("--sweep", action="store_true", help="prune the worst parameter sets after the first tasks")
+	parser.add_argument("--rungs", type=int, nargs="+", default=[1, 2], help="tasks after which the sweep prunes (default: 1 2)")
+	parser.add_argument("--eta", type=float, default=2, help="the sweep keeps 1/eta of the parameter sets at every rung (default: 2)")
+	parser.add_argument("--checkpoint-dir", default=config['checkpoint_dir'], help="directory of the checkpoints (default: result_dir/checkpoints)")
+	args = parser.parse_args(argv)
+
+	config = dict(config)
+	config['resume'] = config['resume'] or args.resume
+	config['split_runs'] = config['split_runs'] or args.split_runs
+	config['checkpoint_dir'] = args.checkpoint_dir
+	if args.sweep:
+		from .sweep import run_sweep
+		return run_sweep(config, params, args.rungs, args.eta)
+	return run_experiment(config, params)
@@ -0,0 +1,102 @@
+# Evaluation of a trained network on a labeled test set
+
+import numpy as np
+
+from .encoding import encode_spikes
+from .profiling import clock
+
+
+def check_accuracy(images, labels, w_in, w_out, config, spikes=None, profiler=None, rng=np.random):
+	"""Present a set of labeled images to the network and count correct inferences
+	The images are simulated test_batch_size at a time: the layer states are
+	[batch, neurons] arrays and every time step is one matrix-matrix product
+	:param images: images
+	:param labels: labels
+	:param config: simulation parameters
+	:param spikes: SpikeCache of the images, None to draw the spike trains here
+	:param profiler: Profiler that the "evaluation spike generation" and "evaluation LIF" time is added to, or None
+	:param rng: np.random or a numpy Generator that the spike trains are drawn from
+	:return: fraction of labels correctly inferred
+	"""
+	n_in, n_h1, n_out = config['n_in'], config['n_h1'], config['n_out']
+	MaxF, tSim, dt_conv, dt, nBins = config['MaxF'], config['tSim'], config['dt_conv'], config['dt'], config['nBins']
+	t_syn, t_syn1, t_m, t_mH = config['t_syn'], config['t_syn1'], config['t_m'], config['t_mH']
+	R, RH, V_rest, t_refr = config['R'], config['RH'], config['V_rest'], config['t_refr']
+	Vth, VthO = config['Vth'], config['VthO']
+	test_batch_size = config['test_batch_size']
+
+	numCorrect = 0
+
+	for b in range(0, len(images), test_batch_size):
+		batch = images[b:b+test_batch_size]
+		n_b = len(batch)
+		cnt = np.zeros((n_b, n_out))
+
+		if profiler is not None:
+			t0 = clock()
+		if spikes is not None:
+			spikeMat = spikes[b:b+n_b].view(bool).transpose(2, 0, 1)
+		else:
+			# Spike trains are drawn one image after the other, as in the sequential evaluation
+			spikeMat = encode_spikes(MaxF, batch, tSim, dt_conv, rng).transpose(2, 0, 1)
+		if profiler is not None:
+			t0 = profiler.add("evaluation spike generation", t0)
+
+		# Initialize hidden layer variables
+		I1 = np.zeros((n_b, n_h1))
+		V1 = np.zeros((n_b, n_h1))
+
+		# Initialize output layer variables
+		I2 = np.zeros((n_b, n_out))
+		V2 = np.zeros((n_b, n_out))
+
+		# Initialize firing time variables
+		ts1 = np.full((n_b, n_h1), -t_refr)
+		ts2 = np.full((n_b, n_out), -t_refr)
+
+
+		for t in range(nBins):
+			# Update hidden neuron synaptic currents
+			I1 += (dt/t_syn) * (spikeMat[t].dot(w_in.T) - I1)
+
+			# Update hidden neuron membrane potentials
+			V1 += (dt/t_m) * ((V_rest - V1) + I1 * R)
+			V1[V1 < -Vth/10] = -Vth/10 # Limit negative potential to -Vth/10
+
+			# Clear membrane potential of hidden neurons that spiked more
+			# recently than t_refr
+			V1[t*dt - ts1 <= t_refr] = 0
+
+			## Process hidden neuron spikes
+			fired = V1 >= Vth # Hidden neurons that spiked
+			V1[fired] = 0 # Reset their membrane potential to zero
+			ts1[fired] = t # Update their most recent spike times
+
+			# Make array of hidden-neuron spikes
+			ST1 = fired.astype(float)
+
+			# Update output neuron synaptic currents
+			I2 += (dt/t_syn1)*(ST1.dot(w_out.T) - I2)
+
+			# Update output neuron membrane potentials
+			V2 += (dt/t_mH)*((V_rest - V2) + I2*(RH))
+			V2[V2 < -VthO/10] = -VthO/10 # Limit negative potential to -Vth0/10
+
+			# Clear V of output neurons that spiked more recently than t_refr
+			refr2 = (t*dt - ts2 <= t_refr)
+			V2[refr2] = 0
+
+			## Process output spikes
+			fired2 = V2 >= VthO # output neurons that spikes
+			V2[fired2] = 0 # Reset their membrane potential to zero
+			ts2[fired2] = t # Update their most recent spike times
+
+			cnt += fired2
+
+		spiked = np.count_nonzero(cnt, axis=1) != 0  # Avoid counting no spikes as predicting label 0
+		prediction = np.argmax(cnt, axis=1)
+		numCorrect += np.count_nonzero(spiked & (prediction == labels[b:b+n_b]))
+		if profiler is not None:
+			profiler.add("evaluation LIF", t0)
+
+	return numCorrect/len(images)
@@ -0,0 +1,181 @@
+# Optional compiled time-step kernel for train_sample (requires numba)
+#
+# The kernel fuses the forward pass, the refractory handling, the error
+# neurons and the error compartments of consecutive time steps. Everything
+# that draws random numbers stays in NumPy: the kernel returns as soon as
+# a step needs the learning rule (|U1| > U_in or |U2| > U_out), so that the
+# gate and the memristor programming consume the global random stream in
+# the same order as before. Steps whose synaptic input train_sample would
+# compute with a dense matrix product are handed back as well, since the
+# summation order of BLAS cannot be reproduced. The remaining arithmetic
+# follows the NumPy path operation by operation, so both backends give
+# bit-identical results.
+
+import numpy as np
+
+try:
+	import numba
+except ImportError:
+	numba = None
+
+available = numba is not None
+
+# status returned by run_steps
+DONE = 0 # all time steps of the sample are done
+UPDATE = 1 # step t is done and the rule has to update the weights
+NUMPY_STEP = 2 # step t has to be run by network_step
+
+
+if available:
+	@numba.njit(cache=True)
+	def _run_steps(t, nBins, spikeMat, s_label, label, w_in, w_out, w_err_h1p, w_err_h1n, leak, trace,
+				   I1, V1, U1, ST1, ts1, I2, V2, U2, ST2, ts2, Ierr, Verr1, Verr2, Serr1, Serr2, Xh_in, Xh_hid, Xh_out,
+				   ind_in, ind_hid, I1_new, V1_new, fired1,
+				   c_syn, c_syn1, c_m, c_mH, c_mU, c_mE, t_tr, R, RH, RU, RE, V_rest, t_refr, dt,
+				   Vth, VthO, VthE, V_min, VO_min, VE_min, FPF, max_in, max_hid, U_in, U_out):
+		n_in = w_in.shape[1]
+		n_h1 = w_in.shape[0]
+		n_out = w_out.shape[0]
+
+		while t < nBins:
+			# Find input neurons that spike
+			n_fired_in = 0
+			for j in range(n_in):
+				if spikeMat[j, t] != 0:
+					ind_in[n_fired_in] = j
+					n_fired_in += 1
+			if n_fired_in > max_in:
+				return t, NUMPY_STEP
+
+			# Hidden layer, kept aside until the output layer is known to be sparse
+			n_fired = 0
+			for i in range(n_h1):
+				inp = 0.0
+				if n_fired_in > 0:
+					inp = w_in[i, ind_in[0]]
+					for q in range(1, n_fired_in):
+						inp += w_in[i, ind_in[q]]
+				I = I1[i] + (inp - I1[i])*c_syn
+				V = V1[i] + ((V_rest - V1[i]) + I*R)*c_m
+				if V < V_min:
+					V = V_min
+				if t*dt - ts1[i] <= t_refr:
+					V = 0.0
+				fired1[i] = V >= Vth
+				if fired1[i]:
+					V = 0.0
+					ind_hid[n_fired] = i
+					n_fired += 1
+				I1_new[i] = I
+				V1_new[i] = V
+			if n_fired > max_hid:
+				return t, NUMPY_STEP
+
+			if trace:
+				for j in range(n_in):
+					tmp = Xh_in[j]/t_tr
+					Xh_in[j] += spikeMat[j, t]
+					Xh_in[j] -= tmp
+			for i in range(n_h1):
+				I1[i] = I1_new[i]
+				V1[i] = V1_new[i]
+				if fired1[i]:
+					ts1[i] = t
+					ST1[i] = 1.0
+				else:
+					ST1[i] = 0.0
+				if trace:
+					tmp = Xh_hid[i]/t_tr
+					Xh_hid[i] += ST1[i]
+					Xh_hid[i] -= tmp
+
+			# Output layer and error neurons
+			for o in range(n_out):
+				inp = 0.0
+				if n_fired > 0:
+					inp = w_out[o, ind_hid[0]]
+					for q in range(1, n_fired):
+						inp += w_out[o, ind_hid[q]]
+				I2[o] += (inp - I2[o])*c_syn1
+				V = V2[o] + ((V_rest - V2[o]) + I2[o]*RH)*c_mH
+				if V < VO_min:
+					V = VO_min
+				if t*dt - ts2[o] <= t_refr:
+					V = 0.0
+				if V >= VthO:
+					V = 0.0
+					ts2[o] = t
+					ST2[o] = 1.0
+				else:
+					ST2[o] = 0.0
+				V2[o] = V
+				if trace:
+					tmp = Xh_out[o]/t_tr
+					Xh_out[o] += ST2[o]
+					Xh_out[o] -= tmp
+
+				Ierr[o] = ST2[o] - s_label[o, t]
+				err = (Ierr[o]*RE)*c_mE
+
+				Verr1[o] += err
+				if Verr1[o] < VE_min:
+					Verr1[o] = VE_min
+				Serr1[o] = 0.0
+				if Verr1[o] >= VthE:
+					Verr1[o] -= VthE
+					Serr1[o] = 1.0
+
+				Verr2[o] -= err
+				if Verr2[o] < VE_min:
+					Verr2[o] = VE_min
+				Serr2[o] = 0.0
+				if Verr2[o] >= VthE:
+					Verr2[o] -= VthE
+					Serr2[o] = 1.0
+			Verr1[label] *= FPF
+
+			# Error compartments
+			update = False
+			for i in range(n_h1):
+				err_p = 0.0
+				err_n = 0.0
+				for o in range(n_out):
+					if Serr1[o] != 0:
+						err_p += w_err_h1p[i, o]
+					if Serr2[o] != 0:
+						err_n += w_err_h1n[i, o]
+				dU = (err_p - err_n)*RU
+				if leak:
+					dU -= U1[i]
+				U1[i] += dU*c_mU
+				if abs(U1[i]) > U_in:
+					update = True
+			for o in range(n_out):
+				dU = (Serr1[o] - Serr2[o])*RU
+				if leak:
+					dU -= U2[o]
+				U2[o] += dU*c_mU
+				if abs(U2[o]) > U_out:
+					update = True
+			if update:
+				return t, UPDATE
+
+			t += 1
+
+		return t, DONE
+
+
+def run_steps(t, spikeMat, s_label, label, w_in, w_out, w_err_h1p, w_err_h1n, leak, trace, state, config):
+	"""Run time steps from t until the end of the sample or until a step needs NumPy
+	:return: (t, status), where status is DONE, UPDATE (step t is done and
+		needs the learning rule) or NUMPY_STEP (step t has not been started)
+	"""
+	dt = config['dt']
+	return _run_steps(t, config['nBins'], spikeMat, s_label, label, w_in, w_out, w_err_h1p, w_err_h1n, leak, trace,
+					  state.I1, state.V1, state.U1, state.ST1, state.ts1, state.I2, state.V2, state.U2, state.ST2, state.ts2,
+					  state.Ierr, state.Verr1, state.Verr2, state.Serr1, state.Serr2, state.Xh_in, state.Xh_hid, state.Xh_out,
+					  state.ind_in, state.ind_hid, state.I1_new, state.V1_new, state.fired1,
+					  dt/config['t_syn'], dt/config['t_syn1'], dt/config['t_m'], dt/config['t_mH'], dt/config['t_mU'], dt/config['t_mE'],
+					  config['t_tr'], config['R'], config['RH'], config['RU'], config['RE'], config['V_rest'], config['t_refr'], dt,
+					  config['Vth'], config['VthO'], config['VthE'], -config['Vth']/10, -config['VthO']/10, -config['VthE']/10, config['FPF'],
+					  config['sparse_density']*len(state.ind_in), config['sparse_density']*len(state.ind_hid), config['U_in'], config['U_out'])
@@ -0,0 +1,72 @@
+# Per-phase timing of the training and evaluation hot paths
+#
+# With config['profile'] set, train_run hands a Profiler to train_sample,
+# network_step, the learning rule and check_accuracy, which add the time
+# spent in every phase of the simulation and count the memristor programming
+# events. The phases nest: "hidden update" and "output update" include the
+# "res_program" time of their layer, "evaluation" includes the "evaluation
+# spike generation" and "evaluation LIF" time. Without a profiler the hot
+# paths only test for None.
+
+import csv
+import json
+import os.path
+from time import perf_counter as clock
+
+from .results import NumpyEncoder, result_file_name
+
+# rule phases and programming events of the hidden (0) and output (1) layer
+UPDATE_PHASES = ("hidden update", "output update")
+PROGRAM_EVENTS = ("programmed hidden", "programmed output")
+PROGRAM_CALLS = ("program calls hidden", "program calls output")
+
+
+class Profiler:
+	""" Cumulative time and number of calls of every phase, and event counts """
+	def __init__(self):
+		self.seconds = {}
+		self.calls = {}
+		self.events = {}
+
+	def add(self, phase, t0):
+		"""Add the time since t0 (from clock()) to a phase
+		:return: the current clock(), to time the next phase from
+		"""
+		t = clock()
+		self.seconds[phase] = self.seconds.get(phase, 0.0) + (t - t0)
+		self.calls[phase] = self.calls.get(phase, 0) + 1
+		return t
+
+	def count(self, event, n=1):
+		self.events[event] = self.events.get(event, 0) + int(n)
+
+	def report(self):
+		"""Phases (in order of first use) with their calls, seconds and µs per call, and the events"""
+		phases = [{'phase': p, 'calls': self.calls[p], 'seconds': s, 'us_per_call': 1e6*s/self.calls[p]}
+				  for p, s in self.seconds.items()]
+		return {'phases': phases, 'events': dict(self.events)}
+
+	def save(self, file_base, **info):
+		"""Write the report as file_base.json (with the info entries) and file_base.csv"""
+		report = dict(info)
+		report.update(self.report())
+		with open(file_base + ".json", "w") as f:
+			f.write(json.dumps(report, indent=4, cls=NumpyEncoder))
+		with open(file_base + ".csv", "w", newline="") as f:
+			out = csv.writer(f)
+			out.writerow(["name", "kind", "calls", "seconds", "us_per_call"])
+			for p in report['phases']:
+				out.writerow([p['phase'], "phase", p['calls'], p['seconds'], p['us_per_call']])
+			for event, n in report['events'].items():
+				out.writerow([event, "event", n, "", ""])
+
+
+def profile_path(config, run, tasks=None):
+	"""File name (without extension) of the profile of one run of a parameter set, in result_dir
+	:param tasks: (first, last) task trained by a run that covered only part of the tasks
+		(a sweep rung or a resumed run), None for a whole run
+	"""
+	name = "{}_ind{}_run{}".format(result_file_name(config), config['ind'], run)
+	if tasks is not None:
+		name += "_tasks{}-{}".format(*tasks)
+	return os.path.join(config['result_dir'], name + "_profile")
@@ -0,0 +1,67 @@
+# Accuracy summaries and json output
+
+import json
+import os.path
+
+import numpy as np
+
+
+class NumpyEncoder(json.JSONEncoder):
+	""" Special json encoder for numpy types """
+	def default(self, obj):
+		if isinstance(obj, np.integer):
+			return int(obj)
+		elif isinstance(obj, np.floating):
+			return float(obj)
+		elif isinstance(obj, (np.ndarray,)):
+			return obj.tolist()
+		return json.JSONEncoder.default(self, obj)
+
+
+def summarize_accuracy(Acc):
+	"""Summarize the accuracy tensor Acc[tested task, trained task, run]
+	:return: dict with the per-task accuracy after its own task (class_Acc) and after
+		the last task (class_cont_Acc), the mean final accuracy (cont_mean) and Acc itself
+	"""
+	n_tasks = Acc.shape[0]
+	avg_task_acc = np.mean(Acc,axis=2)
+	avg_task_std = np.std(Acc,axis=2)
+	class_cont_Acc= np.zeros(n_tasks)
+	class_cont_std =np.zeros(n_tasks)
+	for i in range(n_tasks):
+		class_cont_Acc[i] = avg_task_acc[i,n_tasks-1]
+		class_cont_std[i] = avg_task_std[i,n_tasks-1]
+
+	class_Acc= np.zeros(n_tasks)
+	class_std =np.zeros(n_tasks)
+	for i in range(n_tasks):
+		class_Acc[i] = avg_task_acc[i,i]
+		class_std[i] = avg_task_std[i,i]
+
+	cont_acc = np.mean(Acc,axis=0)[n_tasks-1]
+
+	mean_cont_acc = np.mean(cont_acc)
+	std_cont_acc = np.std(cont_acc)
+
+	return {'class_Acc':class_Acc, 'class_std':class_std, 'class_cont_Acc':class_cont_Acc, 'class_cont_std':class_cont_std,
+			'cont_mean' : mean_cont_acc, 'cont_std' : std_cont_acc,  'Acc' : Acc}
+
+
+def result_file_name(config):
+	"""Name of the results json of a parameter set, from config['result_name']
+	(a format string of the configuration entries or a function of the configuration)
+	"""
+	result_name = config['result_name']
+	if callable(result_name):
+		return result_name(config)
+	return result_name.format(**config)
+
+
+def save_results(results, name, result_dir):
+	jsonString = json.dumps(results, indent=4, cls=NumpyEncoder)
+
+	filename = "./%s.json" % name
+	result_path = os.path.join(result_dir, filename)
+	jsonFile = open(result_path, "w")
+	jsonFile.write(jsonString)
+	jsonFile.close()
@@ -0,0 +1,122 @@
+# Appendable results store
+#
+# Every accuracy measurement Acc[tested task, trained task, run] is appended
+# to the store as soon as check_accuracy returns, so that a sweep can be
+# monitored while it runs. The store is a directory with one subdirectory per
+# parameter set, named by a hash of its configuration, holding the
+# configuration (params.json) and one segment per run. A segment is written
+# by a single worker and keeps every column in its own append-only binary
+# file, so that parallel runs never write to the same file. load_results
+# reads all of it back into one tidy DataFrame.
+
+import hashlib
+import json
+import os
+import os.path
+import time
+
+import numpy as np
+import pandas as pd
+
+from .results import NumpyEncoder, result_file_name
+
+# columns of a segment
+COLUMNS = (('run', np.int32), ('trained_task', np.int32), ('tested_task', np.int32), ('acc', np.float64), ('time', np.float64))
+
+# configuration entries that do not change the results, left out of the hash
+# (test_batch_size is hashed: batched evaluation sums in another order)
+RUN_ONLY = ('ind', 'data_dir', 'data_cache', 'result_dir', 'result_name', 'result_store', 'record', 'processes',
+			'checkpoint_every', 'checkpoint_dir', 'resume', 'backend', 'profile')
+
+
+def _json(obj):
+	return json.dumps(obj, sort_keys=True, cls=NumpyEncoder, default=repr)
+
+
+def device_key(file_path):
+	"""Name and content digest of a device file, the same in every checkout"""
+	with open(file_path, "rb") as f:
+		digest = hashlib.sha1(f.read()).hexdigest()[:16]
+	return "{}:{}".format(os.path.basename(file_path), digest)
+
+
+def param_hash(config):
+	"""Key of a parameter set in the store: hash of its configuration, without RUN_ONLY entries
+	and with the device file by its content instead of its path"""
+	hashed = {k: v for k, v in config.items() if k not in RUN_ONLY}
+	hashed['device_file'] = device_key(config['device_file'])
+	return hashlib.sha1(_json(hashed).encode()).hexdigest()[:16]
+
+
+def store_path(config):
+	"""Directory of the store, result_store relative to result_dir (None: no store)"""
+	if config['result_store'] is None:
+		return None
+	return os.path.join(config['result_dir'], config['result_store'])
+
+
+class ResultWriter:
+	""" Appends the measurements of one run of a parameter set to the store """
+	def __init__(self, path, params, config, run):
+		self.key = param_hash(config)
+		set_path = os.path.join(path, self.key)
+		os.makedirs(set_path, exist_ok=True)
+		params_file = os.path.join(set_path, "params.json")
+		if not os.path.exists(params_file):
+			info = {'key': self.key, 'name': result_file_name(config),
+					'params': {k: v for k, v in params.items() if k != 'ind'},
+					'config': {k: v for k, v in config.items() if k not in RUN_ONLY}}
+			tmp_file = "{}.{}.tmp".format(params_file, os.getpid())
+			with open(tmp_file, "w") as f:
+				f.write(_json(info))
+			os.replace(tmp_file, params_file)
+
+		self.segment = os.path.join(set_path, "run{}_{}".format(run, os.getpid()))
+		os.makedirs(self.segment, exist_ok=True)
+		self.run = run
+
+	def append(self, trained_task, tested_task, acc):
+		"""Append one measurement, column by column"""
+		row = {'run': self.run, 'trained_task': trained_task, 'tested_task': tested_task, 'acc': acc, 'time': time.time()}
+		for name, dtype in COLUMNS:
+			with open(os.path.join(self.segment, name), "ab") as f:
+				f.write(np.asarray(row[name], dtype).tobytes())
+
+
+def load_results(path, config_columns=()):
+	"""Read a results store into a DataFrame with one row per measurement
+	:param path: directory of the store
+	:param config_columns: configuration entries to add as columns, besides the params of every set
+	:return: DataFrame with the columns key, name, the params, config_columns, run,
+		trained_task, tested_task, acc and time (seconds since the epoch)
+	"""
+	frames = []
+	for key in sorted(os.listdir(path)):
+		params_file = os.path.join(path, key, "params.json")
+		if not os.path.exists(params_file):
+			continue
+		with open(params_file) as f:
+			info = json.load(f)
+		for segment in sorted(os.listdir(os.path.join(path, key))):
+			segment_path = os.path.join(path, key, segment)
+			if not os.path.isdir(segment_path):
+				continue
+			columns = {}
+			for name, dtype in COLUMNS:
+				file_path = os.path.join(segment_path, name)
+				columns[name] = np.fromfile(file_path, dtype) if os.path.exists(file_path) else np.zeros(0, dtype)
+			n = min(len(c) for c in columns.values()) # a worker may have stopped within a row
+			frame = pd.DataFrame({name: c[:n] for name, c in columns.items()})
+			frame.insert(0, 'key', key)
+			frame.insert(1, 'name', info['name'])
+			for i, (k, v) in enumerate(list(info['params'].items()) + [(k, info['config'].get(k)) for k in config_columns]):
+				frame.insert(2+i, k, [v]*n)
+			frames.append(frame)
+	if not frames:
+		return pd.DataFrame(columns=['key', 'name'] + [name for name, dtype in COLUMNS])
+	results = pd.concat(frames, ignore_index=True)
+	# a resumed or repeated run measures again, keep the latest measurement
+	results = results.sort_values('time', kind='stable')
+	results = results.drop_duplicates(subset=['key', 'run', 'trained_task', 'tested_task'], keep='last')
+	results = results.sort_values(['key', 'run', 'trained_task', 'tested_task'], kind='stable')
+	return results.reset_index(drop=True)
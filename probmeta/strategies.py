@@ -0,0 +1,439 @@
+# Pluggable parts of the learning rule: metaplasticity sharing, update gates
+# and the weight update rules themselves. Each experiment picks one of each
+# by name through the "meta", "gate" and "rule" configuration entries.
+
+import numpy as np
+
+from .profiling import clock, UPDATE_PHASES, PROGRAM_EVENTS, PROGRAM_CALLS
+from .streams import generator_state, set_generator_state
+
+
+### Metaplasticity coefficients
+
+def block_index(m, post, pre):
+	""" Flat indices of the synapses (post, pre) of the 2-D array m, row by row """
+	return (np.reshape(post, (len(post),1))*m.shape[1] + pre).ravel()
+
+
+def active_blocks(X, blk_size, n_blk, th):
+	""" Indices of the inputs that belong to a block of blk_size inputs with mean trace above th """
+	X_blk = np.mean(np.reshape(X[:n_blk*blk_size], (n_blk, blk_size)), axis=1)
+	blk = np.where(X_blk > th)[0]
+	return (np.reshape(blk, (len(blk),1))*blk_size + np.arange(blk_size)).ravel()
+
+
+def grow_m(m, ind, dm, m_max):
+	""" Add dm to the entries ind (flat indices) of m in place and clip them at m_max.
+	The coefficients start at 0 and only grow, so the entries that are not
+	touched never need to be clipped.
+	"""
+	m_flat = m.reshape(-1) # a view, m is contiguous
+	m_up = m_flat.take(ind)
+	m_up += dm
+	np.minimum(m_up, m_max, out=m_up)
+	m_flat.put(ind, m_up)
+
+
+class IndividualM:
+	""" One metaplasticity coefficient per synapse """
+	def __init__(self, config):
+		self.config = config
+		self.m_in = np.zeros((config['n_h1'], config['n_in'])) # every run the metaplasticity factors start at 0
+		self.m_out = np.zeros((config['n_out'], config['n_h1']))
+
+	def m_up(self, layer, post, pre):
+		m = self.m_in if layer == 0 else self.m_out
+		return m[np.ix_(post, pre)]
+
+	def update(self, Xh_in, Xh_hid, Xh_out):
+		c = self.config
+		h_in = np.where(Xh_in>c['m_th_in'])[0]
+		h_hid = np.where(Xh_hid>c['m_th_hid'])[0]
+		h_out = np.where(Xh_out>c['m_th_out'])[0]
+		grow_m(self.m_in, block_index(self.m_in, h_hid, h_in), c['dm_in'], c['m_in_max'])
+		grow_m(self.m_out, block_index(self.m_out, h_out, h_hid), c['dm_out'], c['m_out_max'])
+
+	def snapshot(self):
+		return np.copy(self.m_in), np.copy(self.m_out)
+
+
+class NeuronSharedM(IndividualM):
+	""" One metaplasticity coefficient per post-synaptic neuron """
+	def __init__(self, config):
+		self.config = config
+		self.m_in = np.zeros((config['n_h1']))
+		self.m_out = np.zeros((config['n_out']))
+
+	def m_up(self, layer, post, pre):
+		m = self.m_in if layer == 0 else self.m_out
+		return np.reshape(m[post], (len(post),1)) # shared by all pre-synaptic inputs
+
+	def update(self, Xh_in, Xh_hid, Xh_out):
+		c = self.config
+		h_hid = np.where(Xh_hid>c['m_th_hid'])[0]
+		h_out = np.where(Xh_out>c['m_th_out'])[0]
+		grow_m(self.m_in, h_hid, c['dm_in'], c['m_in_max'])
+		grow_m(self.m_out, h_out, c['dm_out'], c['m_out_max'])
+
+
+class LayerSharedM(IndividualM):
+	""" One metaplasticity coefficient per layer, driven by the mean layer activity """
+	def __init__(self, config):
+		self.config = config
+		self.m_in = 0
+		self.m_out = 0
+
+	def m_up(self, layer, post, pre):
+		return self.m_in if layer == 0 else self.m_out
+
+	def update(self, Xh_in, Xh_hid, Xh_out):
+		c = self.config
+		if np.mean(Xh_hid) > c['m_th_hid']:
+			self.m_in = min(self.m_in + c['dm_in'], c['m_in_max'])
+		if np.mean(Xh_out) > c['m_th_out']:
+			self.m_out = min(self.m_out + c['dm_out'], c['m_out_max'])
+
+	def snapshot(self):
+		return self.m_in, self.m_out
+
+
+class ModuleSharedM(IndividualM):
+	""" Metaplasticity coefficients grown together for blocks of pre-synaptic inputs:
+	a block of hid_blk_size inputs (out_blk_size hidden neurons) is consolidated
+	when its mean activity passes m_th_in (m_th_hid2)
+	"""
+	def update(self, Xh_in, Xh_hid, Xh_out):
+		c = self.config
+		hid_blk_size = c['hid_blk_size']
+		out_blk_size = c['out_blk_size']
+
+		h_hid = np.where(Xh_hid>c['m_th_hid1'])[0]
+		h_in = active_blocks(Xh_in, hid_blk_size, int(c['n_in']/hid_blk_size), c['m_th_in'])
+		grow_m(self.m_in, block_index(self.m_in, h_hid, h_in), c['dm_in'], c['m_in_max'])
+
+		h_out = np.where(Xh_out>c['m_th_out'])[0]
+		h_blk = active_blocks(Xh_hid, out_blk_size, int(c['n_h1']/out_blk_size), c['m_th_hid2'])
+		grow_m(self.m_out, block_index(self.m_out, h_out, h_blk), c['dm_out'], c['m_out_max'])
+
+
+META = {'individual': IndividualM, 'neuron': NeuronSharedM, 'layer': LayerSharedM, 'module': ModuleSharedM}
+
+
+### Update gates: return the candidate updates that are blocked
+
+class GateVariates:
+	""" Uniform variates of the gates. Without a Generator they are drawn from the
+	global numpy random state at every update event, as in the original scripts.
+	With one (e.g. the Philox "gate" stream of the run, see streams.py) they are
+	generated in bulk, buffer_size at a time, and handed out in order, so that
+	the variates of many update events cost one call.
+	"""
+	def __init__(self, rng=None, buffer_size=2**16):
+		self.rng = rng
+		self.buffer_size = buffer_size
+		self.buffer = np.zeros(0)
+		self.pos = 0
+
+	def random(self, shape):
+		"""Uniform variates in [0, 1) of the given shape (() for a scalar)"""
+		if self.rng is None:
+			return np.random.rand(*shape)
+		n = 1
+		for k in shape:
+			n *= k
+		pos = self.pos
+		if pos + n > len(self.buffer):
+			self.buffer = np.concatenate((self.buffer[pos:], self.rng.random(max(self.buffer_size, n))))
+			pos = 0
+		self.pos = pos + n
+		if shape == ():
+			return self.buffer[pos]
+		return self.buffer[pos:pos+n].reshape(shape)
+
+	def permutation(self, n):
+		if self.rng is None:
+			a = np.arange(n)
+			np.random.shuffle(a)
+			return a
+		return self.rng.permutation(n)
+
+	def get_state(self):
+		"""Generator state and unused buffer, for a checkpoint"""
+		return {'gate_rng': generator_state(self.rng), 'gate_buffer': self.buffer[self.pos:]}
+
+	def set_state(self, state):
+		set_generator_state(self.rng, state['gate_rng'])
+		self.buffer = np.array(state['gate_buffer'])
+		self.pos = 0
+
+
+class Gate:
+	""" An update passes if its variate is below its probability. With sampling
+	"scalar" one variate is shared by all candidate synapses of an update event,
+	with "row" one by the synapses of every post-synaptic neuron, with
+	"synapse" every synapse has its own; None is the default of the gate.
+	"""
+	default_sampling = "synapse"
+
+	def __init__(self, config, variates=None):
+		self.config = config
+		self.variates = variates if variates is not None else GateVariates()
+		self.sampling = config['gate_sampling'] or self.default_sampling
+		if self.sampling not in ("scalar", "row", "synapse"):
+			raise ValueError("unknown gate_sampling {}".format(self.sampling))
+
+	def start_task(self, d):
+		pass
+
+	def draw(self, n_post, n_pre):
+		"""Variates of the n_post x n_pre candidate updates of an event, broadcastable to that shape"""
+		if self.sampling == "scalar":
+			return self.variates.random(())
+		if self.sampling == "row":
+			return self.variates.random((n_post, 1))
+		return self.variates.random((n_post, n_pre))
+
+
+class MetaGate(Gate):
+	""" Probabilistic metaplasticity: an update passes with probability exp(-m|w|) """
+	default_sampling = "scalar"
+
+	def update_prob(self, syn, post, pre, m_up):
+		w_up = syn.w[np.ix_(post, pre)] # the candidate weights for update
+		return (np.exp(-m_up*np.abs(w_up)))
+
+	def __call__(self, syn, post, pre, m_up):
+		w_th = self.update_prob(syn, post, pre, m_up)
+		w_rand = self.draw(len(post), len(pre))
+		return w_rand > w_th
+
+
+class ShuffledGate(MetaGate):
+	""" Random consolidation: the update probabilities of MetaGate are shuffled
+	across the candidate synapses
+	"""
+	def __call__(self, syn, post, pre, m_up):
+		w_th = self.update_prob(syn, post, pre, m_up)
+		a = self.variates.permutation(w_th.shape[0])
+		b = self.variates.permutation(w_th.shape[1])
+		w_th_shuffled = w_th[np.ix_(a,b)]
+		w_rand = self.draw(len(post), len(pre))
+		return w_rand > w_th_shuffled
+
+
+class DecayGate(Gate):
+	""" Decaying plasticity: every update passes with a probability that is divided
+	by prob_reduction_factor at the start of every task after the first
+	"""
+	def __init__(self, config, variates=None):
+		super().__init__(config, variates)
+		self.prob = 1
+
+	def start_task(self, d):
+		if d>0:  # reduce update probability after the first task
+			self.prob = self.prob/(self.config['prob_reduction_factor'])
+
+	def __call__(self, syn, post, pre, m_up):
+		w_rand = self.draw(len(post), len(pre))
+		return np.broadcast_to(w_rand > self.prob, (len(post), len(pre)))
+
+
+GATES = {'meta': MetaGate, 'shuffled': ShuffledGate, 'decay': DecayGate}
+
+
+### Weight update rules
+
+class ProbRule:
+	""" Error-triggered update: when the error compartment U of a neuron passes
+	U_in (U_out), all its synapses from active inputs are programmed by one level
+	against the sign of the error, subject to the gate
+	"""
+	leak = False # the error compartments integrate without leak
+	cross_offset = 1
+	kernel_support = True # step() only acts once |U1| > U_in or |U2| > U_out
+	batch_support = True # step_batch() collects the updates of a batch of samples
+
+	def __init__(self, config, syn_in, syn_out, meta, gate):
+		self.config = config
+		self.syn = (syn_in, syn_out)
+		self.meta = meta
+		self.gate = gate
+		self.defer = config['defer_updates']
+		self.pending = ([], []) # (rows, cols, c_up) updates of every layer collected for a deferred programming
+		self.d = 0
+		self.profiler = None # Profiler of the run, set by train_run
+		if "updates" in config['record']:
+			self.c_count = [np.zeros((config['n_h1'], config['n_in'], config['n_tasks'])), np.zeros((config['n_out'], config['n_h1'], config['n_tasks']))]
+		else:
+			self.c_count = None
+
+	def start_task(self, d):
+		self.d = d
+		if self.gate is not None:
+			self.gate.start_task(d)
+
+	def start_sample(self):
+		pass
+
+	def step(self, U1, U2, I1, I2, fired_in, fired):
+		up_hid = np.where(np.abs(U1)>self.config['U_in'])[0]
+		up_out = np.where(np.abs(U2)>self.config['U_out'])[0]
+
+		if len(up_hid)>0: # if any neuron error has passed threshold
+			self.update(0, U1, I1, up_hid, fired_in[0])
+		if len(up_out)>0:
+			self.update(1, U2, I2, up_out, fired[0])
+
+	def idle(self, U1, U2):
+		"""True if step() does nothing for these error compartments while no neuron spikes"""
+		return (max(U1.max(), -U1.min()) <= self.config['U_in']) and (max(U2.max(), -U2.min()) <= self.config['U_out'])
+
+	def update(self, layer, U, I, up, pre_ind, defer=None):
+		"""Program (or with defer, collect) the updates of the neurons up
+		:param defer: None for config['defer_updates']
+		"""
+		if defer is None:
+			defer = self.defer
+		if self.profiler is not None:
+			t0 = clock()
+			self._update(layer, U, I, up, pre_ind, defer)
+			self.profiler.add(UPDATE_PHASES[layer], t0)
+		else:
+			self._update(layer, U, I, up, pre_ind, defer)
+
+	def _update(self, layer, U, I, up, pre_ind, defer):
+		syn = self.syn[layer]
+		post_ind = np.nonzero((I[up]>self.config['Imin']) & (I[up]<self.config['Imax']))[0]
+		if len(post_ind)>0:
+			if len(pre_ind) != 0:
+				post = up[post_ind]
+				s = np.sign(U[post])  # getting the sign of the errors, it is 1 if U positive, -1 if if U negative
+				U[post] = 0
+				# candidate updates (post x pre_ind, row-major), against the sign of the error
+				rows = np.repeat(post, len(pre_ind))
+				cols = np.tile(pre_ind, len(post))
+				c_up = np.repeat(-s, len(pre_ind))
+				if self.gate is not None:
+					m_up = self.meta.m_up(layer, post, pre_ind) if self.meta is not None else None
+					keep = ~self.gate(syn, post, pre_ind, m_up).ravel()
+					rows, cols, c_up = rows[keep], cols[keep], c_up[keep]
+				if defer:
+					self.pending[layer].append((rows, cols, c_up))
+				else:
+					self.program(layer, (rows, cols), c_up)
+
+	def program(self, layer, up_mem, c_up):
+		if len(up_mem[0])>0:
+			if self.c_count is not None:
+				self.c_count[layer][up_mem[0], up_mem[1], self.d] += 1
+			if self.profiler is not None:
+				t0 = clock()
+				self.syn[layer].program(up_mem, c_up)
+				self.profiler.add("res_program", t0)
+				self.profiler.count(PROGRAM_EVENTS[layer], len(up_mem[0]))
+				self.profiler.count(PROGRAM_CALLS[layer])
+			else:
+				self.syn[layer].program(up_mem, c_up)
+
+	def collected(self, layer):
+		"""Synapses with deferred updates, in row-major order, and the sum of their
+		updates (synapses whose updates cancel are left out); clears the collection
+		:return: (rows, cols), c_up
+		"""
+		pending = self.pending[layer]
+		if len(pending) == 0:
+			return (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)), np.zeros(0)
+		rows, cols, c_up = (np.concatenate(a) for a in zip(*pending))
+		pending.clear()
+		n2 = self.syn[layer].w.shape[1]
+		ind, inverse = np.unique(rows*n2 + cols, return_inverse=True)
+		c = np.bincount(inverse, weights=c_up, minlength=len(ind))
+		nz = np.nonzero(c)[0]
+		return np.divmod(ind[nz], n2), c[nz]
+
+	def end_sample(self):
+		if self.defer:
+			for layer in range(2):
+				up_mem, c = self.collected(layer)
+				self.program(layer, up_mem, c)
+
+	def start_batch(self):
+		pass
+
+	def step_batch(self, U1, U2, I1, I2, ST0, ST1):
+		"""step() for a batch of samples, [sample, neuron] arrays, collecting the updates"""
+		for layer, U, I, pre, th in ((0, U1, I1, ST0, self.config['U_in']), (1, U2, I2, ST1, self.config['U_out'])):
+			rows, up = np.nonzero(np.abs(U)>th)
+			if len(rows)>0:
+				bounds = np.flatnonzero(np.diff(rows)) + 1
+				for b, up_b in zip(rows[np.r_[0, bounds]], np.split(up, bounds)):
+					self.update(layer, U[b], I[b], up_b, np.nonzero(pre[b])[0], defer=True)
+
+	def end_batch(self):
+		"""Program every synapse with collected updates by one level, in the direction of their sum"""
+		for layer in range(2):
+			up_mem, c = self.collected(layer)
+			self.program(layer, up_mem, np.sign(c))
+
+
+class GradAccRule(ProbRule):
+	""" Gradient accumulation: the leaky error compartments drive weight gradients
+	that are accumulated per synapse and programmed once they pass U_in (U_out)
+	"""
+	leak = True
+	cross_offset = 0
+	kernel_support = False # accumulates gradients at every step
+	batch_support = False
+
+	def __init__(self, config, syn_in, syn_out, meta, gate):
+		super().__init__(config, syn_in, syn_out, meta, gate)
+		self.U_s = None # gradient accumulators, allocated at the first sample
+
+	def start_sample(self):
+		if self.U_s is None:
+			self.U_s = [np.zeros(syn.w.shape) for syn in self.syn]
+		else:
+			for U_s in self.U_s:
+				U_s.fill(0)
+
+	def step(self, U1, U2, I1, I2, fired_in, fired):
+		profiler = self.profiler
+		for layer, U, I, pre_ind, lr, th in ((0, U1, I1, fired_in[0], self.config['lr0'], self.config['U_in']),
+											 (1, U2, I2, fired[0], self.config['lr1'], self.config['U_out'])):
+			if profiler is not None:
+				t0 = clock()
+			if len(pre_ind) != 0:
+				self.accumulate(layer, U, I, pre_ind, lr)
+			# U_s accumulates the gradients
+			up = np.where(abs(self.U_s[layer])>=th)
+			if len(up[0])>0:
+				self.apply(layer, up)
+			if profiler is not None:
+				profiler.add(UPDATE_PHASES[layer], t0)
+
+	def idle(self, U1, U2):
+		# without spikes nothing is accumulated, and the accumulators that passed
+		# U_in (U_out) were applied and cleared at the step they did
+		return True
+
+	def accumulate(self, layer, U, I, pre_ind, lr):
+		post_ind = np.nonzero((I>self.config['Imin']) & (I<self.config['Imax']))
+		if len(post_ind[0])>0:
+			UF = U[post_ind[0]]
+			dw = np.repeat(-lr*UF[:, None], len(pre_ind), axis=1)
+			if self.meta is not None:
+				m_up = self.meta.m_up(layer, post_ind[0], pre_ind)
+				w_up = self.syn[layer].w[np.ix_(post_ind[0], pre_ind)]
+				dw = dw*np.exp(-(np.abs(m_up*w_up)))
+			self.U_s[layer][np.ix_(post_ind[0], pre_ind)] += dw
+
+	def apply(self, layer, up):
+		s = np.sign(self.U_s[layer][up])
+		self.U_s[layer][up] = 0
+		self.program(layer, up, s)
+
+	def end_sample(self):
+		pass
+
+
+RULES = {'prob': ProbRule, 'grad_acc': GradAccRule}
@@ -0,0 +1,55 @@
+# Named random streams of a run
+#
+# With config['rng_streams'] every source of randomness of a run draws from
+# a stream of its own: "data" the train and test samples and the shuffle of
+# every task, "spikes" the input and target spike trains, "device" the
+# initial states and the programming variability of the memristors,
+# "feedback" the random feedback weights and "gate" the variates of the
+# plasticity gate. A run then gives the same results whichever process it
+# runs in and whatever ran before it. Every stream is a numpy Generator on a Philox (counter-based) bit generator,
+# seeded from SeedSequence(seed, spawn_key=(run, stream)): the child `stream`
+# of the child `run` of the SeedSequence of the parameter set seed. The
+# streams of different runs, and the streams of one run, are independent,
+# whatever order they are used in.
+
+import pickle
+
+import numpy as np
+
+# spawn index of every stream of a run
+STREAMS = {'gate': 0, 'data': 1, 'spikes': 2, 'device': 3, 'feedback': 4}
+
+
+def run_stream(seed, run, name):
+	"""Generator of the stream name of one run"""
+	return np.random.Generator(np.random.Philox(np.random.SeedSequence(seed, spawn_key=(run, STREAMS[name]))))
+
+
+def generator_state(rng):
+	"""State of a Generator as a uint8 array, for a checkpoint"""
+	return np.frombuffer(pickle.dumps(rng.bit_generator.state), dtype=np.uint8)
+
+
+def set_generator_state(rng, state):
+	"""Restore a state returned by generator_state"""
+	rng.bit_generator.state = pickle.loads(np.asarray(state, dtype=np.uint8).tobytes())
+
+
+class RunStreams:
+	""" The Generators of all STREAMS of one run, by name """
+	def __init__(self, seed, run):
+		self.rng = {name: run_stream(seed, run, name) for name in STREAMS}
+
+	def __getitem__(self, name):
+		return self.rng[name]
+
+	def get_state(self):
+		"""States of all streams as a uint8 array, for a checkpoint"""
+		states = {name: rng.bit_generator.state for name, rng in self.rng.items()}
+		return np.frombuffer(pickle.dumps(states), dtype=np.uint8)
+
+	def set_state(self, state):
+		"""Restore a state returned by get_state"""
+		states = pickle.loads(np.asarray(state, dtype=np.uint8).tobytes())
+		for name, rng in self.rng.items():
+			rng.bit_generator.state = states[name]
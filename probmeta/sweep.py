@@ -0,0 +1,93 @@
+# Successive halving over a list of parameter sets
+#
+# All runs of all parameter sets first train the tasks up to the first rung.
+# The parameter sets are then ranked by their mean accuracy over the tasks
+# learned so far, and only the best 1/eta of them continue, from their
+# checkpoints, to the next rung, and so on up to the last task. The survivors
+# are saved as by run_experiment; every score and pruning decision is kept in
+# the sweep trace, and every accuracy measured on the way is in the results
+# store.
+# Every run is a job of its own, seeded from (seed, run) as with split_runs:
+# the results equal those of run_experiment with split_runs, not those of the
+# default single stream per parameter set that the original scripts used.
+
+import json
+import math
+import os.path
+import string
+from multiprocessing import Pool, RLock
+
+import numpy as np
+from tqdm import tqdm
+
+from .data import data_load
+from .experiment import _init_worker, _run_job, job_config, merge_runs
+from .results import NumpyEncoder, result_file_name
+
+
+def partial_score(Acc, n_trained):
+	"""Mean accuracy on the first n_trained tasks after training them, averaged over the runs
+	:param Acc: Acc[tested task, trained task, run]
+	"""
+	return np.mean(Acc[:n_trained, n_trained-1, :])
+
+
+def sweep_name(config):
+	"""Name of a sweep: the literal text of result_name, without the fields that differ between its parameter sets"""
+	result_name = config['result_name']
+	if callable(result_name):
+		return result_name.__name__
+	return "".join(literal for literal, field, spec, conversion in string.Formatter().parse(result_name)).strip("_")
+
+
+def run_sweep(config, params, rungs=(1, 2), eta=2):
+	"""Train the parameter sets of params with successive halving
+	:param config: simulation parameters, see default_config
+	:param params: list of per-run parameter dicts, each with 'ind' and 'seed'
+	:param rungs: numbers of trained tasks after which the parameter sets are ranked and pruned
+	:param eta: 1/eta of the parameter sets (at least one) is kept at every rung
+	:return: results dicts of the parameter sets that trained all tasks, and the sweep trace
+	"""
+	if config['checkpoint_every'] is None:
+		raise ValueError("the sweep continues the runs from their checkpoints, checkpoint_every must be set")
+	# every run is a job seeded from (seed, run); split_runs labels its results and store hash accordingly
+	config = dict(config, split_runs=True)
+	n_tasks = config['n_tasks']
+	rungs = sorted(r for r in set(rungs) if 0 < r < n_tasks) + [n_tasks]
+	configs = [job_config(config, p) for p in params]
+
+	data = data_load(config['load_type'], config['data_dir'], config['data_cache'])
+	tqdm.set_lock(RLock())
+	n_jobs = sum(c['n_runs'] for c in configs)
+	p = Pool(initializer=_init_worker, initargs=(tqdm.get_lock(), config, data), processes = min(config['processes'], n_jobs))
+
+	alive = list(range(len(params)))
+	Acc = [np.zeros((n_tasks, n_tasks, c['n_runs'])) for c in configs]
+	records = [{} for c in configs]
+	trace = []
+	for r, n_trained in enumerate(rungs):
+		jobs = [(i, run) for i in alive for run in range(configs[i]['n_runs'])]
+		# the first rung starts the runs, the later ones continue them from their checkpoints
+		resume = config['resume'] if r == 0 else True
+		outputs = p.map(_run_job, [(params[i], run, position, n_trained, resume) for position, (i, run) in enumerate(jobs)])
+		for (i, run), (acc, run_records) in zip(jobs, outputs):
+			Acc[i][:, :, run] = acc
+			records[i].update(run_records)
+
+		scores = {i: partial_score(Acc[i], n_trained) for i in alive}
+		n_keep = len(alive) if n_trained == n_tasks else max(1, int(math.ceil(len(alive)/eta)))
+		ranked = sorted(alive, key=lambda i: scores[i], reverse=True)
+		for rank, i in enumerate(ranked):
+			trace.append({'rung': r, 'n_trained': n_trained, 'ind': params[i]['ind'], 'name': result_file_name(configs[i]),
+						  'params': params[i], 'score': scores[i], 'rank': rank, 'kept': rank < n_keep})
+		alive = sorted(ranked[:n_keep])
+	p.close()
+	p.join()
+
+	results = [merge_runs(config, params[i], [(Acc[i][:, :, run], records[i]) for run in range(configs[i]['n_runs'])]) for i in alive]
+
+	trace_file = os.path.join(config['result_dir'], "{}_sweep_trace.json".format(sweep_name(config)))
+	with open(trace_file, "w") as f:
+		f.write(json.dumps(trace, indent=4, cls=NumpyEncoder))
+
+	return results, trace
@@ -0,0 +1,43 @@
+# Split-task construction: which samples belong to every task of a taskID
+# schedule, and their labels within the task
+
+import numpy as np
+
+
+class TaskSplit:
+	""" Sample indices and labels of every task of a schedule, built with one
+	pass over the labels
+	Every row of taskID lists the classes of one task (rows may differ in
+	length). The samples of a task are those of its classes, class by class in
+	the order of the row and in ascending index order within a class. With
+	task_labels "position" a sample is labelled with the position of its class
+	in the row (0 and 1 for two-class tasks); with "class" with the class itself.
+	"""
+	def __init__(self, labels, taskID, task_labels="position"):
+		labels = np.asarray(labels)
+		order = np.argsort(labels, kind='stable')
+		classes, start = np.unique(labels[order], return_index=True)
+		bounds = np.append(start, len(labels))
+		# class -> sorted indices of its samples
+		self.class_ind = {c.item(): order[bounds[k]:bounds[k+1]] for k, c in enumerate(classes)}
+		empty = order[:0]
+
+		self.ind = []
+		self.labels = []
+		for task in taskID:
+			class_ind = [self.class_ind.get(c, empty) for c in np.asarray(task).tolist()]
+			self.ind.append(np.concatenate(class_ind))
+			if task_labels == "position":
+				task_lbl = np.arange(len(class_ind))
+			elif task_labels == "class":
+				task_lbl = np.asarray(task)
+			else:
+				raise ValueError("unknown task_labels {}".format(task_labels))
+			self.labels.append(np.repeat(task_lbl, [len(ind) for ind in class_ind]))
+
+	def __len__(self):
+		return len(self.ind)
+
+	def sizes(self):
+		"""Number of samples of every task"""
+		return np.array([len(ind) for ind in self.ind])
@@ -0,0 +1,820 @@
+# Continual learning of split tasks with a memristive spiking network
+
+import warnings
+
+import numpy as np
+from tqdm import tqdm
+
+from .checkpoint import checkpoint_path, save_checkpoint, load_checkpoint, restore_checkpoint
+from .config import derive_config
+from .device import device_setup, MemristorArray, CompactMemristorArray
+from .encoding import make_spike_trains, MNIST_to_Spikes, SpikeCache
+from . import kernels
+from .inference import check_accuracy
+from .profiling import clock, Profiler, profile_path
+from .results import summarize_accuracy, result_file_name, save_results
+from .store import ResultWriter, store_path
+from .strategies import META, GATES, RULES, GateVariates
+from .streams import run_stream, RunStreams
+from .tasks import TaskSplit
+
+
+def synaptic_input(w, spikes, fired, max_density, out):
+	"""Weighted sum w.dot(spikes) of a spike vector, written to out
+	When at most max_density of the inputs spiked, only the weight columns of
+	those inputs are summed instead of the full matrix-vector product
+	:param fired: indices of the inputs that spiked
+	"""
+	if len(fired) <= max_density*len(spikes):
+		return np.sum(w[:, fired], axis=1, out=out)
+	if np.result_type(w, spikes) != out.dtype: # float32 compact weights and uint8 cached spikes
+		spikes = spikes.astype(out.dtype)
+	return np.dot(w, spikes, out=out)
+
+
+class SampleState:
+	""" Neuron variables and scratch arrays of train_sample. They are allocated
+	once per run and reset for every sample, so that the time loop only
+	works in place. With a batch_size, every variable is a [sample, neuron]
+	array for train_batch.
+	"""
+	def __init__(self, config, batch_size=None):
+		if batch_size is None:
+			n_in, n_h1, n_out = config['n_in'], config['n_h1'], config['n_out']
+		else:
+			n_in, n_h1, n_out = (batch_size, config['n_in']), (batch_size, config['n_h1']), (batch_size, config['n_out'])
+		self.batch_size = batch_size
+		self.t_refr = config['t_refr']
+
+		# Hidden layer variables
+		self.I1 = np.zeros(n_h1)
+		self.V1 = np.zeros(n_h1)
+		self.U1 = np.zeros(n_h1)
+		self.ST1 = np.zeros(n_h1)
+		self.ts1 = np.full(n_h1, -self.t_refr)
+
+		# Output layer variables
+		self.I2 = np.zeros(n_out)
+		self.V2 = np.zeros(n_out)
+		self.U2 = np.zeros(n_out)
+		self.ST2 = np.zeros(n_out)
+		self.ts2 = np.full(n_out, -self.t_refr)
+
+		# Error neuron variables
+		self.Ierr = np.zeros(n_out)
+		self.Verr1 = np.zeros(n_out)
+		self.Verr2 = np.zeros(n_out)
+		self.Serr1 = np.zeros(n_out)
+		self.Serr2 = np.zeros(n_out)
+
+		# Activity traces for the metaplasticity update
+		self.Xh_in = np.zeros(n_in)
+		self.Xh_hid = np.zeros(n_h1)
+		self.Xh_out = np.zeros(n_out)
+
+		# Scratch arrays
+		self.tmp_in = np.zeros(n_in)
+		self.tmp1 = np.zeros(n_h1)
+		self.tmp1b = np.zeros(n_h1)
+		self.mask1 = np.zeros(n_h1, dtype=bool)
+		self.tmp2 = np.zeros(n_out)
+		self.tmp2b = np.zeros(n_out)
+		self.mask2 = np.zeros(n_out, dtype=bool)
+
+		# Scratch arrays of the compiled kernel
+		self.ind_in = np.zeros(n_in, dtype=np.intp)
+		self.ind_hid = np.zeros(n_h1, dtype=np.intp)
+		self.I1_new = np.zeros(n_h1)
+		self.V1_new = np.zeros(n_h1)
+		self.fired1 = np.zeros(n_h1, dtype=bool)
+
+	def reset(self):
+		for a in (self.I1, self.V1, self.U1, self.I2, self.V2, self.U2, self.Verr1, self.Verr2, self.Xh_in, self.Xh_hid, self.Xh_out):
+			a.fill(0)
+		self.ts1.fill(-self.t_refr)
+		self.ts2.fill(-self.t_refr)
+
+
+def lif_step(V, I, ts, t, tau, R, Vth, tmp, mask, dt, V_rest, t_refr):
+	"""Leaky integrate-and-fire update of one layer in place
+	:param tmp: two scratch arrays and mask one boolean scratch array of the layer size
+	:return: indices of the neurons that spiked, as returned by np.nonzero
+	"""
+	tmp_a, tmp_b = tmp
+	np.subtract(V_rest, V, out=tmp_a)
+	np.multiply(I, R, out=tmp_b)
+	tmp_a += tmp_b
+	tmp_a *= dt/tau
+	V += tmp_a
+	np.maximum(V, -Vth/10, out=V) # Limit negative potential
+
+	# If neuron in refractory period, prevent changes to membrane potential
+	np.subtract(t*dt, ts, out=tmp_a)
+	np.less_equal(tmp_a, t_refr, out=mask)
+	V[mask] = 0
+
+	np.greater_equal(V, Vth, out=mask)
+	fired = np.nonzero(mask) # neurons that spiked
+	V[fired] = 0 # Reset their membrane potential to zero
+	ts[fired] = t # Update their most recent spike times
+	return fired
+
+
+def quiescent(t, state, config):
+	"""True if no neuron can spike from step t on for as long as no input and no
+	target spike arrives: no neuron is refractory, every membrane potential stays
+	below its threshold and no error neuron is at threshold. Without input, I
+	decays to 0 and V moves towards V_rest + I*R at every step (or is held at its
+	lower limit), so V stays below the largest of its current value and V_rest + I*R.
+	"""
+	dt, R, RH, V_rest, t_refr = config['dt'], config['R'], config['RH'], config['V_rest'], config['t_refr']
+	Vth, VthO, VthE = config['Vth'], config['VthO'], config['VthE']
+	if not 0 <= config['FPF'] <= 1 or dt > min(config['t_syn'], config['t_syn1'], config['t_m'], config['t_mH']):
+		return False
+	if t*dt - max(state.ts1.max(), state.ts2.max()) <= t_refr:
+		return False
+	for I, V, R_, Vth_ in ((state.I1, state.V1, R, Vth), (state.I2, state.V2, RH, VthO)):
+		if V.max() >= Vth_ or V_rest + R_*I.max() >= Vth_:
+			return False
+	return state.Verr1.max() < VthE and state.Verr2.max() < VthE
+
+
+def decay_layer(I, V, n, a, b, R, V_rest, V_min):
+	"""Advance I and V of a layer without input by n steps in closed form, in place
+	The currents decay as I_k = a**k I_0 and the potentials follow
+	V_k = max(V_min, b V_(k-1) + (1-b) (V_rest + R I_k)). A potential that hits
+	V_min stays there until V_rest + R I_k has risen above V_min, and then
+	follows the unclamped recursion again.
+	"""
+	k = np.arange(1, n+1)
+	ak = a**k
+	bk = b**k
+	if a != b:
+		s = a*(ak - bk)/(a - b) # sum of a**j b**(k-j) for j = 1..k
+	else:
+		s = k*ak
+	# unclamped potentials of every step, [neuron, step]
+	V_k = np.outer(V, bk) + V_rest*(1 - bk) + (1 - b)*R*np.outer(I, s)
+	below = V_k < V_min
+	clamped = np.nonzero(np.any(below, axis=1))[0]
+	V_n = V_k[:, -1]
+	if len(clamped) > 0:
+		# the potential is held at V_min up to the step before the target first reaches V_min
+		target = V_rest + R*np.outer(I[clamped], ak)
+		rising = target >= V_min
+		k2 = np.where(np.any(rising, axis=1), np.argmax(rising, axis=1) + 1, n+1) # first such step, 1-based
+		m = n - k2 + 1 # steps from there on
+		bm = b**m
+		if a != b:
+			s_m = a**k2*(a**m - bm)/(a - b)
+		else:
+			s_m = m*a**k2*b**(m-1)
+		V_n[clamped] = bm*V_min + V_rest*(1 - bm) + (1 - b)*R*I[clamped]*s_m
+	V[:] = V_n
+	I *= a**n
+
+
+def decay_steps(n, label, leak, trace, state, config):
+	"""Advance a quiescent network (see quiescent) by n time steps in closed form"""
+	dt, V_rest, t_tr = config['dt'], config['V_rest'], config['t_tr']
+	decay_layer(state.I1, state.V1, n, 1 - dt/config['t_syn'], 1 - dt/config['t_m'], config['R'], V_rest, -config['Vth']/10)
+	decay_layer(state.I2, state.V2, n, 1 - dt/config['t_syn1'], 1 - dt/config['t_mH'], config['RH'], V_rest, -config['VthO']/10)
+
+	for a in (state.ST1, state.ST2, state.Ierr, state.Serr1, state.Serr2):
+		a.fill(0)
+	state.Verr1[label] *= config['FPF']**n
+	if leak:
+		state.U1 *= (1 - dt/config['t_mU'])**n
+		state.U2 *= (1 - dt/config['t_mU'])**n
+	if trace:
+		for Xh in (state.Xh_in, state.Xh_hid, state.Xh_out):
+			Xh *= (1 - 1/t_tr)**n
+
+
+def network_step(t, spikeMat, s_label, label, syn_in, syn_out, w_err_h1p, w_err_h1n, leak, trace, state, config, profiler=None):
+	"""Advance the network and its error neurons by time step t, in place in state
+	:param s_label: target spike trains of the sample (n_out, nBins)
+	:param leak: whether the error compartments U1, U2 leak
+	:param trace: whether to update the activity traces Xh
+	:param profiler: Profiler that the "forward LIF" and "error neurons" time is added to, or None
+	:return: indices of the input and hidden neurons that spiked, as returned by np.nonzero
+	"""
+	dt, t_syn, t_syn1, t_m, t_mH, t_mU, t_mE, t_tr = config['dt'], config['t_syn'], config['t_syn1'], config['t_m'], config['t_mH'], config['t_mU'], config['t_mE'], config['t_tr']
+	R, RH, RU, RE, V_rest, t_refr = config['R'], config['RH'], config['RU'], config['RE'], config['V_rest'], config['t_refr']
+	Vth, VthO, VthE, FPF = config['Vth'], config['VthO'], config['VthE'], config['FPF']
+	sparse_density = config['sparse_density']
+
+	I1, V1, U1, ST1, ts1 = state.I1, state.V1, state.U1, state.ST1, state.ts1
+	I2, V2, U2, ST2, ts2 = state.I2, state.V2, state.U2, state.ST2, state.ts2
+	Ierr, Verr1, Verr2, Serr1, Serr2 = state.Ierr, state.Verr1, state.Verr2, state.Serr1, state.Serr2
+	Xh_in, Xh_hid, Xh_out = state.Xh_in, state.Xh_hid, state.Xh_out
+	tmp_in, tmp1, tmp1b, mask1, tmp2, tmp2b, mask2 = state.tmp_in, state.tmp1, state.tmp1b, state.mask1, state.tmp2, state.tmp2b, state.mask2
+
+	if profiler is not None:
+		t0 = clock()
+
+	# Forward pass
+
+	# Find input neurons that spike
+	ST0 = spikeMat[:, t]
+	fired_in = np.nonzero(ST0)
+	if trace:
+		np.divide(Xh_in, t_tr, out=tmp_in)
+		Xh_in += ST0
+		Xh_in -= tmp_in
+
+	# Update synaptic current into hidden layer
+	synaptic_input(syn_in.w, ST0, fired_in[0], sparse_density, tmp1)
+	tmp1 -= I1
+	tmp1 *= dt/t_syn
+	I1 += tmp1
+
+	# Update hidden layer membrane potentials and find the neurons that spiked
+	fired = lif_step(V1, I1, ts1, t, t_m, R, Vth, (tmp1, tmp1b), mask1, dt, V_rest, t_refr)
+
+	ST1.fill(0) # Hidden layer spiking activity
+	ST1[fired] = 1 # Set neurons that spiked to 1
+	if trace:
+		np.divide(Xh_hid, t_tr, out=tmp1)
+		Xh_hid += ST1
+		Xh_hid -= tmp1
+
+	# Repeat the process for the output layer
+	synaptic_input(syn_out.w, ST1, fired[0], sparse_density, tmp2)
+	tmp2 -= I2
+	tmp2 *= dt/t_syn1
+	I2 += tmp2
+
+	fired2 = lif_step(V2, I2, ts2, t, t_mH, RH, VthO, (tmp2, tmp2b), mask2, dt, V_rest, t_refr)
+
+	# Make array of output neuron spikes
+	ST2.fill(0)
+	ST2[fired2] = 1
+	if trace:
+		np.divide(Xh_out, t_tr, out=tmp2)
+		Xh_out += ST2
+		Xh_out -= tmp2
+
+	if profiler is not None:
+		t0 = profiler.add("forward LIF", t0)
+
+	# Compare with target spikes for this time step
+	np.subtract(ST2, s_label[:, t], out=Ierr)
+	np.multiply(Ierr, RE, out=tmp2)
+	tmp2 *= dt/t_mE
+
+	# Update false-positive error neuron membrane potentials
+	Verr1 += tmp2
+	np.maximum(Verr1, -VthE/10, out=Verr1) # Limit negative potential to -VthE/10
+
+	## Process spikes in false-positive error neurons
+	np.greater_equal(Verr1, VthE, out=mask2)
+	np.subtract(Verr1, VthE, out=Verr1, where=mask2)
+
+	# Don't penalize "false positive" spikes on the target
+	Verr1[label] *= FPF
+
+	# Make array of false-positive error neuron spikes
+	np.copyto(Serr1, mask2)
+
+	# Update false-negative error neuron membrane potentials
+	Verr2 -= tmp2
+	np.maximum(Verr2, -VthE/10, out=Verr2)
+
+	## Process spikes in false-negative error neurons
+	np.greater_equal(Verr2, VthE, out=mask2)
+	np.subtract(Verr2, VthE, out=Verr2, where=mask2)
+
+	# Make array of false-negative error neuron spikes
+	np.copyto(Serr2, mask2)
+
+	# Error compartment inputs (hidden neurons through the random weights)
+	np.dot(w_err_h1p, Serr1, out=tmp1)
+	np.dot(w_err_h1n, Serr2, out=tmp1b)
+	tmp1 -= tmp1b
+	tmp1 *= RU
+	np.subtract(Serr1, Serr2, out=tmp2)
+	tmp2 *= RU
+	if leak:
+		tmp1 -= U1
+		tmp2 -= U2
+
+	# Update hidden and output neuron error compartments
+	tmp1 *= dt/t_mU
+	U1 += tmp1
+	tmp2 *= dt/t_mU
+	U2 += tmp2
+
+	if profiler is not None:
+		profiler.add("error neurons", t0)
+
+	return fired_in, fired
+
+
+def train_sample(spikeMat, label, syn_in, syn_out, w_err_h1p, w_err_h1n, rule, meta, config, pbar=None, state=None, profiler=None, rng=np.random):
+	"""Present one training image and apply the learning rule at every time step
+	With config['backend'] == "numba" the time steps run in a compiled kernel,
+	which hands back to network_step and the rule whenever it cannot reproduce
+	them exactly (see kernels.py). With config['skip_quiescent'] the NumPy loop
+	jumps over the steps without input and target spikes in which no neuron can
+	spike (see quiescent)
+	:param spikeMat: input spike trains of the image (n_in, nBins)
+	:param label: index of the target output neuron
+	:param state: SampleState to reuse, allocated here if None
+	:param profiler: Profiler of the run (see profiling.py), or None
+	:param rng: np.random or a numpy Generator that the target spike trains are drawn from
+	"""
+	n_out, maxFL, dt_conv, nBins = config['n_out'], config['maxFL'], config['dt_conv'], config['nBins']
+	trace = meta is not None
+	use_kernel = config['backend'] == "numba" and rule.kernel_support and kernels.available
+
+	if state is None:
+		state = SampleState(config)
+	state.reset()
+
+	if profiler is not None:
+		profiler.count("training samples")
+		t0 = clock()
+	fr_label = np.zeros(n_out)
+	fr_label[label] = maxFL # target output spiking frequencies
+	s_label = make_spike_trains(fr_label*dt_conv, nBins, rng) # target spikes
+	if profiler is not None:
+		profiler.add("spike generation", t0)
+
+	rule.start_sample()
+
+	if config['skip_quiescent'] and not use_kernel:
+		# steps with input or target spikes, the others may be skipped
+		active = np.flatnonzero(np.any(spikeMat, axis=0) | np.any(s_label, axis=0))
+	else:
+		active = None
+
+	t = 0
+	while t < nBins:
+		if use_kernel:
+			# run the steps that need neither a weight update nor a dense product
+			if profiler is not None:
+				t0 = clock()
+			t_stop, status = kernels.run_steps(t, spikeMat, s_label, label, syn_in.w, syn_out.w, w_err_h1p, w_err_h1n, rule.leak, trace, state, config)
+			if profiler is not None:
+				profiler.add("kernel steps", t0)
+				profiler.count("kernel time steps", t_stop - t)
+			if pbar is not None:
+				pbar.update(t_stop - t)
+			t = t_stop
+			if status == kernels.DONE:
+				break
+			if status == kernels.UPDATE:
+				# step t is complete, the rule programs the memristors
+				rule.step(state.U1, state.U2, state.I1, state.I2, np.nonzero(spikeMat[:, t]), np.nonzero(state.ST1))
+				if pbar is not None:
+					pbar.update(1)
+				t += 1
+				continue
+
+		if active is not None:
+			i = np.searchsorted(active, t)
+			t_next = active[i] if i < len(active) else nBins
+			if t_next - t > 1 and rule.idle(state.U1, state.U2) and quiescent(t, state, config):
+				if profiler is not None:
+					t0 = clock()
+				decay_steps(t_next - t, label, rule.leak, trace, state, config)
+				if profiler is not None:
+					profiler.add("quiescent decay", t0)
+					profiler.count("skipped time steps", t_next - t)
+				if pbar is not None:
+					pbar.update(t_next - t)
+				t = t_next
+				continue
+
+		fired_in, fired = network_step(t, spikeMat, s_label, label, syn_in, syn_out, w_err_h1p, w_err_h1n, rule.leak, trace, state, config, profiler)
+		rule.step(state.U1, state.U2, state.I1, state.I2, fired_in, fired)
+
+		if pbar is not None:
+			pbar.update(1)
+		t += 1
+
+	rule.end_sample()
+
+	# updating the m variable
+	if trace:
+		if profiler is not None:
+			t0 = clock()
+		meta.update(state.Xh_in, state.Xh_hid, state.Xh_out)
+		if profiler is not None:
+			profiler.add("m-update", t0)
+
+
+def network_step_batch(t, spikeMat, s_label, label, syn_in, syn_out, w_err_h1p, w_err_h1n, leak, trace, state, config, profiler=None):
+	"""Advance a batch of networks with the same weights by time step t, as network_step
+	with [sample, neuron] arrays: the synaptic inputs of all samples are one
+	matrix-matrix product per layer
+	:param spikeMat: input spike trains of the samples (batch, n_in, nBins)
+	:param s_label: target spike trains of the samples (batch, n_out, nBins)
+	:param label: target output neuron of every sample
+	:return: input and hidden spikes of every sample, (batch, n_in) and (batch, n_h1)
+	"""
+	dt, t_syn, t_syn1, t_m, t_mH, t_mU, t_mE, t_tr = config['dt'], config['t_syn'], config['t_syn1'], config['t_m'], config['t_mH'], config['t_mU'], config['t_mE'], config['t_tr']
+	R, RH, RU, RE, V_rest, t_refr = config['R'], config['RH'], config['RU'], config['RE'], config['V_rest'], config['t_refr']
+	Vth, VthO, VthE, FPF = config['Vth'], config['VthO'], config['VthE'], config['FPF']
+
+	I1, V1, U1, ST1, ts1 = state.I1, state.V1, state.U1, state.ST1, state.ts1
+	I2, V2, U2, ST2, ts2 = state.I2, state.V2, state.U2, state.ST2, state.ts2
+	Ierr, Verr1, Verr2, Serr1, Serr2 = state.Ierr, state.Verr1, state.Verr2, state.Serr1, state.Serr2
+	Xh_in, Xh_hid, Xh_out = state.Xh_in, state.Xh_hid, state.Xh_out
+	tmp_in, tmp1, tmp1b, mask1, tmp2, tmp2b, mask2 = state.tmp_in, state.tmp1, state.tmp1b, state.mask1, state.tmp2, state.tmp2b, state.mask2
+
+	if profiler is not None:
+		t0 = clock()
+
+	# Forward pass
+	ST0 = spikeMat[:, :, t]
+	if trace:
+		np.divide(Xh_in, t_tr, out=tmp_in)
+		Xh_in += ST0
+		Xh_in -= tmp_in
+
+	if np.result_type(ST0, syn_in.w) != tmp1.dtype: # float32 compact weights and uint8 cached spikes
+		ST0 = ST0.astype(tmp1.dtype)
+	np.dot(ST0, syn_in.w.T, out=tmp1)
+	tmp1 -= I1
+	tmp1 *= dt/t_syn
+	I1 += tmp1
+	fired = lif_step(V1, I1, ts1, t, t_m, R, Vth, (tmp1, tmp1b), mask1, dt, V_rest, t_refr)
+	ST1.fill(0)
+	ST1[fired] = 1
+	if trace:
+		np.divide(Xh_hid, t_tr, out=tmp1)
+		Xh_hid += ST1
+		Xh_hid -= tmp1
+
+	np.dot(ST1, syn_out.w.T, out=tmp2)
+	tmp2 -= I2
+	tmp2 *= dt/t_syn1
+	I2 += tmp2
+	fired2 = lif_step(V2, I2, ts2, t, t_mH, RH, VthO, (tmp2, tmp2b), mask2, dt, V_rest, t_refr)
+	ST2.fill(0)
+	ST2[fired2] = 1
+	if trace:
+		np.divide(Xh_out, t_tr, out=tmp2)
+		Xh_out += ST2
+		Xh_out -= tmp2
+
+	if profiler is not None:
+		t0 = profiler.add("forward LIF", t0)
+
+	# Error neurons, as in network_step
+	np.subtract(ST2, s_label[:, :, t], out=Ierr)
+	np.multiply(Ierr, RE, out=tmp2)
+	tmp2 *= dt/t_mE
+
+	Verr1 += tmp2
+	np.maximum(Verr1, -VthE/10, out=Verr1)
+	np.greater_equal(Verr1, VthE, out=mask2)
+	np.subtract(Verr1, VthE, out=Verr1, where=mask2)
+	Verr1[np.arange(len(label)), label] *= FPF
+	np.copyto(Serr1, mask2)
+
+	Verr2 -= tmp2
+	np.maximum(Verr2, -VthE/10, out=Verr2)
+	np.greater_equal(Verr2, VthE, out=mask2)
+	np.subtract(Verr2, VthE, out=Verr2, where=mask2)
+	np.copyto(Serr2, mask2)
+
+	# Error compartments
+	np.dot(Serr1, w_err_h1p.T, out=tmp1)
+	np.dot(Serr2, w_err_h1n.T, out=tmp1b)
+	tmp1 -= tmp1b
+	tmp1 *= RU
+	np.subtract(Serr1, Serr2, out=tmp2)
+	tmp2 *= RU
+	if leak:
+		tmp1 -= U1
+		tmp2 -= U2
+	tmp1 *= dt/t_mU
+	U1 += tmp1
+	tmp2 *= dt/t_mU
+	U2 += tmp2
+
+	if profiler is not None:
+		profiler.add("error neurons", t0)
+
+	return ST0, ST1
+
+
+def train_batch(spikeMats, labels, syn_in, syn_out, w_err_h1p, w_err_h1n, rule, meta, config, pbar=None, state=None, profiler=None, rng=np.random):
+	"""Present a batch of training images in lockstep, with the weights of the
+	start of the batch
+	The updates that the rule requests for every sample are collected over the
+	batch and applied at its end: every synapse is programmed by one level in
+	the direction of the sign of the sum of its requests (see ProbRule.step_batch)
+	:param spikeMats: input spike trains of the images, each (n_in, nBins)
+	:param labels: index of the target output neuron of every image
+	:param state: SampleState of the batch size to reuse, allocated here if None
+	:param rng: np.random or a numpy Generator that the target spike trains are drawn from
+	"""
+	n_out, maxFL, dt_conv, nBins = config['n_out'], config['maxFL'], config['dt_conv'], config['nBins']
+	trace = meta is not None
+	batch_size = len(labels)
+	labels = np.asarray(labels)
+
+	if state is None or state.batch_size != batch_size:
+		state = SampleState(config, batch_size)
+	state.reset()
+
+	if profiler is not None:
+		profiler.count("training samples", batch_size)
+		t0 = clock()
+	spikeMat = np.stack(spikeMats)
+	s_label = np.zeros((batch_size, n_out, nBins))
+	for b, label in enumerate(labels):
+		fr_label = np.zeros(n_out)
+		fr_label[label] = maxFL # target output spiking frequencies
+		s_label[b] = make_spike_trains(fr_label*dt_conv, nBins, rng) # target spikes
+	if profiler is not None:
+		profiler.add("spike generation", t0)
+
+	rule.start_batch()
+	for t in range(nBins):
+		ST0, ST1 = network_step_batch(t, spikeMat, s_label, labels, syn_in, syn_out, w_err_h1p, w_err_h1n, rule.leak, trace, state, config, profiler)
+		rule.step_batch(state.U1, state.U2, state.I1, state.I2, ST0, ST1)
+		if pbar is not None:
+			pbar.update(batch_size)
+	rule.end_batch()
+
+	# updating the m variable, one sample after the other
+	if trace:
+		if profiler is not None:
+			t0 = clock()
+		for b in range(batch_size):
+			meta.update(state.Xh_in[b], state.Xh_hid[b], state.Xh_out[b])
+		if profiler is not None:
+			profiler.add("m-update", t0)
+	return state
+
+
+def train_run(run, config, data, device, position=0, writer=None, stop_task=None):
+	"""Train and evaluate one network on the sequence of tasks in taskID, using
+	the global numpy random state, or with config['rng_streams'] the
+	RunStreams of (config['seed'], run)
+	:param run: index of the run, for the progress bar and its random streams
+	:param config: simulation parameters, merged with the parameter set
+	:param data: TrainIm_, TrainL_, TestIm_, TestL_
+	:param device: device_setup(config)
+	:param position: line of the progress bar
+	:param writer: ResultWriter that every accuracy is appended to, None for no results store
+	:param stop_task: train and test the tasks before stop_task only, None for all tasks;
+		the run can be continued from its checkpoint with config['resume']
+	:return: Acc[tested task, trained task] and the records of the run
+	"""
+	ind_ = config['ind']
+	n_tasks, maxE, taskID = config['n_tasks'], config['maxE'], config['taskID']
+	n_in, n_h1, n_out, nBins = config['n_in'], config['n_h1'], config['n_out'], config['nBins']
+	init_bins = config['init_bins']
+	MaxF, tSim, dt_conv, spike_cache = config['MaxF'], config['tSim'], config['dt_conv'], config['spike_cache']
+	cache_path = None if spike_cache == "memory" else spike_cache
+	TrainIm_, TrainL_, TestIm_, TestL_ = data
+	rule_class = RULES[config['rule']]
+	batch_size = config['train_batch_size']
+	if config['backend'] == "numba" and not kernels.available:
+		warnings.warn("numba is not installed, training with the NumPy backend")
+	if batch_size is not None and not rule_class.batch_support:
+		raise ValueError("rule {} does not support train_batch_size".format(config['rule']))
+
+	Acc = np.zeros((n_tasks,n_tasks))
+	records = {}
+
+	streams = RunStreams(config['seed'], run) if config['rng_streams'] else None
+	if streams is not None:
+		data_rng, spike_rng, device_rng, feedback_rng = streams['data'], streams['spikes'], streams['device'], streams['feedback']
+		gate_rng = streams['gate']
+	else:
+		data_rng = spike_rng = device_rng = feedback_rng = np.random
+		gate_rng = run_stream(config['seed'], run, 'gate') if config['gate_rng'] == "philox" else None
+
+	# Resuming replays the draws of the run, task and epoch set-up from their saved
+	# random states, then restores the trained state (see checkpoint.py)
+	ckpt_every = config['checkpoint_every']
+	ckpt_path = checkpoint_path(config, run) if ckpt_every is not None else None
+	resume = load_checkpoint(ckpt_path) if ckpt_path is not None and config['resume'] else None
+	d0, e0, u0 = resume['position'] if resume is not None else (0, 0, 0)
+	rng = {}
+	stream_states = {}
+
+	def save_rng(key):
+		rng[key] = np.random.get_state()
+		if streams is not None:
+			stream_states[key] = streams.get_state()
+
+	def load_rng(key):
+		np.random.set_state(resume[key])
+		if streams is not None:
+			streams.set_state(resume[key + '_streams'])
+
+	if resume is not None:
+		load_rng('rng_run')
+	save_rng('rng_run')
+
+	meta = META[config['meta']](config) if config['meta'] is not None else None
+	gate = GATES[config['gate']](config, GateVariates(gate_rng)) if config['gate'] is not None else None
+
+	# Randomly select train and test samples
+	trainInd = data_rng.choice(len(TrainIm_), config['n_train'], replace=False)
+	TrainIm = TrainIm_[trainInd]
+	TrainLabels = TrainL_[trainInd]
+
+	testInd = data_rng.choice(len(TestIm_), config['n_test'], replace=False)
+	TestIm = TestIm_[testInd]
+	TestLabels = TestL_[testInd]
+
+	# Generate forward pass weights
+	if config['compact_state'] is None:
+		syn_in = MemristorArray(device['model'], config['w_in_max'], rule_class.cross_offset, device_rng)
+		syn_out = MemristorArray(device['model'], config['w_out_max'], rule_class.cross_offset, device_rng)
+	else:
+		offset_dtype = np.dtype(config['compact_state'])
+		syn_in = CompactMemristorArray(device['model'], config['w_in_max'], rule_class.cross_offset, offset_dtype, device_rng)
+		syn_out = CompactMemristorArray(device['model'], config['w_out_max'], rule_class.cross_offset, offset_dtype, device_rng)
+	if not config['reinit_per_task']:
+		syn_in.initialize(n_h1, n_in, init_bins)
+		syn_out.initialize(n_out, n_h1, init_bins)
+
+	# Generate random feedback weights
+	w_err_h1p = ((feedback_rng.random((n_h1,n_out)))*2-1)*config['w_err_factor'] # these are random numbers from -1 to 1
+	w_err_h1n = w_err_h1p
+
+	rule = rule_class(config, syn_in, syn_out, meta, gate)
+	state = SampleState(config)
+	batch_state = None
+	profiler = Profiler() if config['profile'] else None
+	rule.profiler = profiler
+
+	# Samples and labels of every task, and the test set and test spike trains
+	# of every task, built once per run
+	train_split = TaskSplit(TrainLabels, taskID, config['task_labels'])
+	test_split = TaskSplit(TestLabels, taskID, config['task_labels'])
+	test_sets = [TestIm[ind] for ind in test_split.ind]
+	test_spikes = [None]*n_tasks
+	if spike_cache is not None:
+		for d2 in range(n_tasks):
+			if profiler is not None:
+				t0 = clock()
+			test_spikes[d2] = SpikeCache(MaxF, test_sets[d2], tSim, dt_conv, cache_path, rng=spike_rng)
+			if profiler is not None:
+				profiler.add("evaluation spike generation", t0)
+
+	def checkpoint(position):
+		save_rng('rng')
+		save_checkpoint(ckpt_path, position, rng, syn_in, syn_out, meta, rule, Acc, records, pbar.n, gate, stream_states)
+
+	with tqdm(total=n_tasks*maxE*int(np.mean(train_split.sizes()))*nBins,desc="Run {} of params index {}".format(run,ind_),position=position,
+			  initial=resume['progress'] if resume is not None else 0) as pbar:
+		for d in range(n_tasks):
+			if stop_task is not None and d >= stop_task:
+				break
+			if d < d0:
+				rule.start_task(d) # trained before the checkpoint
+				continue
+			if resume is not None:
+				if (e0, u0) == (0, 0): # the checkpoint was taken between two tasks
+					restore_checkpoint(resume, syn_in, syn_out, meta, rule, Acc, records, gate, streams)
+					resume = None
+				else:
+					load_rng('rng_task')
+			save_rng('rng_task')
+
+			rule.start_task(d)
+			if config['reinit_per_task']:
+				syn_in.initialize(n_h1, n_in, init_bins)
+				syn_out.initialize(n_out, n_h1, init_bins)
+
+			n_train2 = len(train_split.ind[d])
+			trainInd2 = data_rng.choice(n_train2, n_train2, replace=False) # shuffle the samples of the task
+			trainSet = TrainIm[train_split.ind[d][trainInd2]]
+			taskLabelsF = train_split.labels[d][trainInd2]
+
+			for e in range(maxE):
+				if resume is not None and e < e0:
+					continue
+				if resume is not None:
+					load_rng('rng_epoch')
+				save_rng('rng_epoch')
+				if spike_cache is not None:
+					if profiler is not None:
+						t0 = clock()
+					train_spikes = SpikeCache(MaxF, trainSet, tSim, dt_conv, cache_path, rng=spike_rng)
+					if profiler is not None:
+						profiler.add("spike generation", t0)
+				u_start = 0
+				if resume is not None:
+					restore_checkpoint(resume, syn_in, syn_out, meta, rule, Acc, records, gate, streams)
+					u_start = u0
+					resume = None
+				if batch_size is not None:
+					for u in range(u_start, n_train2, batch_size):
+						u_end = min(u + batch_size, n_train2)
+						if profiler is not None:
+							t0 = clock()
+						if spike_cache is not None:
+							spikeMats = [train_spikes[u2] for u2 in range(u, u_end)]
+						else:
+							spikeMats = [MNIST_to_Spikes(MaxF, trainSet[u2], tSim, dt_conv, spike_rng) for u2 in range(u, u_end)]
+						if profiler is not None:
+							profiler.add("spike generation", t0)
+						batch_state = train_batch(spikeMats, taskLabelsF[u:u_end].astype(int), syn_in, syn_out, w_err_h1p, w_err_h1n, rule, meta, config,
+												  pbar, batch_state, profiler, spike_rng)
+						if ckpt_path is not None and u_end//ckpt_every > u//ckpt_every and u_end < n_train2:
+							checkpoint((d, e, u_end))
+				else:
+					for u in range(u_start, n_train2):
+						if profiler is not None:
+							t0 = clock()
+						if spike_cache is not None:
+							spikeMat = train_spikes[u]
+						else:
+							spikeMat = MNIST_to_Spikes(MaxF, trainSet[u], tSim, dt_conv, spike_rng)
+						if profiler is not None:
+							profiler.add("spike generation", t0)
+						train_sample(spikeMat, int(taskLabelsF[u]), syn_in, syn_out, w_err_h1p, w_err_h1n, rule, meta, config, pbar, state, profiler, spike_rng)
+						if ckpt_path is not None and (u+1)%ckpt_every == 0 and u+1 < n_train2:
+							checkpoint((d, e, u+1))
+
+			if meta is not None and "m" in config['record']:
+				m_in, m_out = meta.snapshot()
+				if d == 0:
+					records['m_in_rec'] = np.zeros(np.shape(m_in) + (n_tasks,))
+					records['m_out_rec'] = np.zeros(np.shape(m_out) + (n_tasks,))
+				records['m_in_rec'][..., d] = m_in
+				records['m_out_rec'][..., d] = m_out
+
+			for d2 in range(d+1):
+				if profiler is not None:
+					t0 = clock()
+				Acc[d2, d] = check_accuracy(test_sets[d2], test_split.labels[d2], syn_in.w, syn_out.w, config, test_spikes[d2], profiler, spike_rng)
+				if profiler is not None:
+					profiler.add("evaluation", t0)
+				if writer is not None:
+					writer.append(d, d2, Acc[d2, d])
+
+			if ckpt_path is not None:
+				checkpoint((d+1, 0, 0))
+
+		if resume is not None: # the checkpoint was taken at the end of the run
+			restore_checkpoint(resume, syn_in, syn_out, meta, rule, Acc, records, gate, streams)
+
+	if "weights" in config['record']:
+		records['w_in_rec'] = syn_in.w
+		records['w_out_rec'] = syn_out.w
+	if rule.c_count is not None:
+		records['c_in_count'] = rule.c_count[0]
+		records['c_out_count'] = rule.c_count[1]
+	d_end = n_tasks if stop_task is None else min(stop_task, n_tasks)
+	if profiler is not None and d0 < d_end:
+		tasks = (d0, d_end-1) if (d0, d_end) != (0, n_tasks) else None
+		profiler.save(profile_path(config, run, tasks), ind=ind_, run=run, tasks=tasks)
+
+	return Acc, records
+
+
+def save_run_results(params, config, Acc, records):
+	"""Summarize the accuracies of all runs and write the results json
+	:param params: parameter set of the runs
+	:param config: simulation parameters, merged with params
+	:param Acc: Acc[tested task, trained task, run]
+	:param records: recorded variables of the last run
+	:return: results dict
+	"""
+	results = {k: v for k, v in params.items() if k != 'ind'}
+	results.update(summarize_accuracy(Acc))
+	results.update(records)
+
+	save_results(results, result_file_name(config), config['result_dir'])
+
+	return results
+
+
+def mem_class_train(params, config, data):
+	"""Train and evaluate n_runs networks one after the other, from one random
+	stream seeded with params['seed']
+	:param params: per-run parameters ('ind', 'seed' and any configuration entry to override)
+	:param config: simulation parameters
+	:param data: TrainIm_, TrainL_, TestIm_, TestL_
+	:return: results dict, also written as json to result_dir
+	"""
+	config = dict(config)
+	config.update(params)
+	derive_config(config)
+
+	n_runs, n_tasks = config['n_runs'], config['n_tasks']
+	device = device_setup(config)
+
+	np.random.seed(config['seed'])
+	Acc = np.zeros((n_tasks,n_tasks,n_runs))
+	records = {}
+
+	for run in range(n_runs):
+		writer = ResultWriter(store_path(config), params, config, run) if config['result_store'] is not None else None
+		Acc[:, :, run], run_records = train_run(run, config, data, device, config['ind'], writer)
+		records.update(run_records)
+
+	return save_run_results(params, config, Acc, records)
@@ -0,0 +1,61 @@
+# Shared fixtures of the tests: a synthetic device and a tiny synthetic
+# dataset, so that the tests run offline in seconds
+
+import os.path
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.abspath(os.path.dirname(__file__)), ".."))
+
+import probmeta
+
+
+def write_device(path, n_levels=16):
+	"""Device file with n_levels evenly spaced conductance levels and 3% spread
+	With 16 levels and w_out_max 1.5 a state lies exactly on the weight -0.5
+	"""
+	g = np.linspace(5e-5, 2e-4, n_levels)
+	file_path = os.path.join(str(path), "device_{}.csv".format(n_levels))
+	pd.DataFrame({'Resistance_level_mean': 1/g, 'Resistance_level_std': 0.03/g}).to_csv(file_path)
+	return file_path
+
+
+@pytest.fixture(scope="session")
+def device_file(tmp_path_factory):
+	return write_device(tmp_path_factory.mktemp("device"))
+
+
+@pytest.fixture(scope="session")
+def data():
+	"""4 classes of 14x14 images, each class with its own bright pixels"""
+	rng = np.random.RandomState(0)
+	prototypes = (rng.rand(4, 196) < 0.3).astype(float)
+	def split(n):
+		labels = np.arange(n) % 4
+		images = np.clip(prototypes[labels] + 0.2*rng.rand(n, 196), 0, 1)
+		return images, labels
+	TrainIm_, TrainL_ = split(80)
+	TestIm_, TestL_ = split(40)
+	return TrainIm_, TrainL_, TestIm_, TestL_
+
+
+@pytest.fixture
+def make_config(device_file, tmp_path):
+	"""Configuration of a 2-task run of the tiny network, with the given overrides"""
+	def make(**kwargs):
+		config = probmeta.default_config(device_file=device_file, n_in=196, n_h1=20, n_train=60, n_test=20, n_runs=2,
+										 n_tasks=2, taskID=np.array([[0, 1], [2, 3]]), test_batch_size=10,
+										 w_in_max=3, w_out_max=1.5, result_dir=str(tmp_path), result_store=None,
+										 checkpoint_every=None, processes=1, ind=0, seed=0)
+		config.update(kwargs)
+		return probmeta.derive_config(config)
+	return make
+
+
+def train(config, data, run=0, seed=1, stop_task=None):
+	"""Acc and records of one run, from the global random state seeded with seed"""
+	np.random.seed(seed)
+	return probmeta.train_run(run, config, data, probmeta.device_setup(config), stop_task=stop_task)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import probmeta
+import probmeta.train
+from conftest import train
+from test_train import assert_same_run
+
+
+class Stop(Exception):
+	pass
+
+
+def interrupted_then_resumed(config, data, stop_after, monkeypatch, name="train_sample"):
+	"""Stop a run after stop_after calls of train_sample (or train_batch), then resume it from its checkpoint"""
+	original = getattr(probmeta.train, name)
+	calls = [0]
+	def stopping(*args, **kwargs):
+		calls[0] += 1
+		if calls[0] > stop_after:
+			raise Stop()
+		return original(*args, **kwargs)
+	with monkeypatch.context() as m:
+		m.setattr(probmeta.train, name, stopping)
+		with pytest.raises(Stop):
+			train(config, data)
+	# a different global state: the resumed run must restore its own
+	return train(dict(config, resume=True), data, seed=99)
+
+
+@pytest.mark.parametrize("stop_after", [7, 45])
+@pytest.mark.parametrize("overrides", [{}, {'gate': "shuffled"}, {'gate': "decay", 'meta': None}, {'rule': "grad_acc"},
+									   {'spike_cache': "memory", 'maxE': 2}, {'compact_state': "float16"}, {'reinit_per_task': True},
+									   {'gate_rng': "philox"}, {'rng_streams': True}])
+def test_resume_matches_uninterrupted_run(make_config, data, monkeypatch, overrides, stop_after):
+	config = make_config(checkpoint_every=4, record=("weights", "updates", "m"), **overrides)
+	uninterrupted = train(config, data)
+	assert_same_run(interrupted_then_resumed(config, data, stop_after, monkeypatch), uninterrupted)
+
+
+def test_resume_batched_training(make_config, data, monkeypatch):
+	config = make_config(checkpoint_every=8, train_batch_size=4, record=("weights",))
+	uninterrupted = train(config, data)
+	assert_same_run(interrupted_then_resumed(config, data, 9, monkeypatch, "train_batch"), uninterrupted)
+
+
+def test_resume_after_stop_task(make_config, data):
+	config = make_config(checkpoint_every=1000, record=("weights",))
+	uninterrupted = train(config, data)
+	train(config, data, stop_task=1)
+	assert_same_run(train(dict(config, resume=True), data, seed=99), uninterrupted)
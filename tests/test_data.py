@@ -0,0 +1,23 @@
+import os.path
+import pickle
+
+import numpy as np
+
+import probmeta
+
+
+def test_cache_matches_memory(tmp_path):
+	# ResNet18 features of the CIFAR script, read into memory and through the cache
+	rng = np.random.RandomState(0)
+	for split, n in (("Train", 30), ("Test", 10)):
+		np.save(os.path.join(str(tmp_path), "Resnet18_FE_{}_Data_Scaled.npy".format(split)), rng.rand(n, 16))
+		np.save(os.path.join(str(tmp_path), "Resnet18_FE_{}_Labels.npy".format(split)), rng.randint(10, size=n))
+	memory = probmeta.data_load("cifar_features", str(tmp_path))
+	cached = probmeta.data_load("cifar_features", str(tmp_path), str(tmp_path / "cache"))
+	ind = rng.choice(30, 12, replace=False)
+	for a, b in zip(memory, cached):
+		assert len(a) == len(b)
+		# the features are stored as float32
+		assert np.allclose(a[ind % len(a)], b[ind % len(b)], rtol=1e-6, atol=0)
+	# workers receive the file name only
+	assert np.array_equal(pickle.loads(pickle.dumps(cached[0]))[ind], cached[0][ind])
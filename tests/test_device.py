@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+import probmeta
+
+# the bins of the original scripts: MNIST four quarters, Fashion-MNIST halves, MNIST nmem1
+ORIGINAL_MASKS = {
+	'four_bin': lambda w: [(w<=-0.5)&(w>=-1), (w<0)&(w>=-0.5), (w>=0)&(w<0.5), (w<=1)&(w>=0.5)],
+	'two_bin': lambda w: [(w<0)&(w>=-1), (w>=0)&(w<=1)],
+	'nmem1': lambda w: [(w<0)&(w>=-1), (w>=0)&(w<0.9)],
+}
+INIT_BINS = {'four_bin': "four_bin", 'two_bin': "two_bin", 'nmem1': [(-1, 0), (0, 0.9)]}
+
+
+def original_initialize(n1, n2, R_f, R_b, model, masks):
+	"""weight_initialize_var of the original scripts"""
+	states, statesP = model.states, model.statesP
+	w_list = probmeta.res_to_weight(states, R_f, R_b)
+	n_tot = n1*n2
+	bins = masks(w_list)
+	ind = np.concatenate([np.random.choice(np.where(b)[0], size=int(n_tot/len(bins)), replace=True) for b in bins])
+	ind_rand = np.random.choice(ind, size=n_tot, replace=False)
+	r = np.zeros((n_tot, model.n_cross))
+	rP = statesP[ind_rand]
+	for i in range(model.n_res_level):
+		loc = np.where(rP == i)
+		if len(loc[0]) != 0:
+			r[loc] = np.random.normal(model.mean_res[i], model.std_res[i], len(loc[0]))
+	r = np.reshape(r, [n1, n2, model.n_cross])
+	return probmeta.res_to_weight(r, R_f, R_b), r
+
+
+@pytest.mark.parametrize("n_cross", [1, 2])
+@pytest.mark.parametrize("w_max", [1.5, 3])
+@pytest.mark.parametrize("bins", sorted(ORIGINAL_MASKS))
+def test_initialization_matches_original_scripts(device_file, bins, w_max, n_cross):
+	# the 16-level device has states exactly on the bin edges -0.5 (w_max 1.5) and -1 (w_max 3)
+	model = probmeta.DeviceModel.from_file(device_file, n_cross)
+	R_f, R_b = model.feedback(w_max)
+	np.random.seed(3)
+	w_ref, r_ref = original_initialize(20, 30, R_f, R_b, model, ORIGINAL_MASKS[bins])
+	np.random.seed(3)
+	w, r = model.initialize(20, 30, R_f, R_b, INIT_BINS[bins])
+	assert np.array_equal(r, r_ref)
+	assert np.array_equal(w, w_ref)
+
+
+def test_init_bins_edges(device_file):
+	model = probmeta.DeviceModel.from_file(device_file, 2)
+	R_f, R_b = model.feedback(1.5)
+	assert -0.5 in model.state_weights(R_f, R_b)
+	# the bin [-0.5, -0.5] holds the state on -0.5, the open bin (-0.5, -0.5] none
+	model.initialize(4, 4, R_f, R_b, [(-0.5, -0.5, True, True)])
+	with pytest.raises(ValueError):
+		model.initialize(4, 4, R_f, R_b, [(-0.5, -0.5, False, True)])
+
+
+@pytest.mark.parametrize("n_cross", [1, 2, 7])
+def test_programmed_weights_match_fresh_sum(device_file, n_cross):
+	# the weights after many programming events, as res_to_weight computes them from the resistances
+	model = probmeta.DeviceModel.from_file(device_file, n_cross)
+	syn = probmeta.MemristorArray(model, 1.5)
+	np.random.seed(4)
+	syn.initialize(10, 12, "four_bin")
+	for event in range(500):
+		up = np.nonzero(np.random.rand(10, 12) < 0.3)
+		syn.program(up, np.random.choice([-1, 1], size=len(up[0])))
+	assert np.array_equal(syn.g, np.sum(1/syn.r, axis=2))
+	assert np.array_equal(syn.w, probmeta.res_to_weight(syn.r, syn.R_f, syn.R_b))
@@ -0,0 +1,31 @@
+import os
+import shutil
+
+import numpy as np
+
+import probmeta
+from conftest import write_device
+
+
+def test_param_hash(tmp_path, make_config):
+	config = make_config()
+	# the same device file in another checkout
+	other = tmp_path / "other"
+	other.mkdir()
+	copy = shutil.copy(config['device_file'], str(other))
+	assert probmeta.param_hash(dict(config, device_file=copy)) == probmeta.param_hash(config)
+	assert probmeta.param_hash(dict(config, device_file=write_device(other, 12))) != probmeta.param_hash(config)
+	assert probmeta.param_hash(dict(config, test_batch_size=1)) != probmeta.param_hash(config)
+	assert probmeta.param_hash(dict(config, result_dir=str(other), processes=3)) == probmeta.param_hash(config)
+
+
+def test_store_round_trip(tmp_path, make_config):
+	config = make_config()
+	path = str(tmp_path / "store")
+	writer = probmeta.ResultWriter(path, {'ind': 0, 'seed': 0}, config, run=1)
+	writer.append(0, 0, 0.75)
+	writer.append(1, 0, 0.5)
+	df = probmeta.load_results(path)
+	assert list(df['acc']) == [0.75, 0.5]
+	assert set(df['key']) == {probmeta.param_hash(config)}
+	assert np.all(df['run'] == 1)
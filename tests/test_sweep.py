@@ -0,0 +1,41 @@
+import glob
+import os.path
+
+import numpy as np
+import pytest
+
+import probmeta
+from probmeta.experiment import job_config
+from probmeta.sweep import sweep_name
+from conftest import train
+
+
+def test_sweep_name(make_config):
+	assert sweep_name(make_config(result_name="mnist_class_U_in_{U_in}U_out_{U_out}")) == "mnist_class_U_in_U_out"
+	assert sweep_name(make_config(result_name="prob_mnist_nmem2_results")) == "prob_mnist_nmem2_results"
+
+
+def test_profiles_of_rungs_are_kept(make_config, data):
+	# a sweep trains the tasks up to a rung, then continues from the checkpoint
+	config = make_config(profile=True, checkpoint_every=1000, result_name="sweep_{U_in}")
+	train(config, data, stop_task=1)
+	train(dict(config, resume=True), data)
+	names = sorted(os.path.basename(f) for f in glob.glob(os.path.join(config['result_dir'], "*_profile.json")))
+	assert names == ["sweep_{}_ind0_run0_tasks{}_profile.json".format(config['U_in'], tasks) for tasks in ("0-0", "1-1")]
+
+
+@pytest.mark.parametrize("rng_streams", [False, True])
+def test_one_rung_sweep_matches_experiment(make_config, data, monkeypatch, rng_streams):
+	monkeypatch.setattr(probmeta.experiment, "data_load", lambda *args: data)
+	monkeypatch.setattr(probmeta.sweep, "data_load", lambda *args: data)
+	# the sweep seeds every run as split_runs does, also when the script does not set it
+	config = make_config(checkpoint_every=1000, rng_streams=rng_streams, result_name="sweep_{ind}", result_store="sweep_store")
+	params = [{'ind': 0, 'seed': 3}, {'ind': 1, 'seed': 4}]
+	results, trace = probmeta.run_sweep(config, params, rungs=[config['n_tasks']], eta=1)
+	reference = probmeta.run_experiment(dict(config, split_runs=True, result_store=None), params)
+	assert len(results) == len(reference) == len(params)
+	for res, ref in zip(results, reference):
+		assert np.array_equal(res['Acc'], ref['Acc'])
+	# and its store rows are keyed as split runs, apart from those of a default run
+	keys = set(probmeta.load_results(os.path.join(config['result_dir'], "sweep_store"))['key'])
+	assert keys == {probmeta.param_hash(job_config(dict(config, split_runs=True), p)) for p in params}
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+import probmeta
+from conftest import train
+
+
+def assert_same_run(a, b):
+	(acc_a, rec_a), (acc_b, rec_b) = a, b
+	assert np.array_equal(acc_a, acc_b)
+	assert rec_a.keys() == rec_b.keys()
+	for key in rec_a:
+		assert np.array_equal(rec_a[key], rec_b[key]), key
+
+
+@pytest.mark.parametrize("sparse_density", [0.05, 1.0])
+@pytest.mark.parametrize("gate, meta", [("meta", "individual"), ("decay", None)])
+def test_numba_backend_matches_numpy(make_config, data, sparse_density, gate, meta):
+	pytest.importorskip("numba")
+	assert probmeta.kernels.available
+	runs = [train(make_config(backend=backend, sparse_density=sparse_density, gate=gate, meta=meta, record=("weights", "updates")), data)
+			for backend in ("numpy", "numba")]
+	assert runs[0][1]['c_in_count'].sum() > 0 and runs[0][1]['c_out_count'].sum() > 0
+	assert_same_run(*runs)
+
+
+@pytest.mark.parametrize("mode", [{}, {'train_batch_size': 4}, {'backend': "numba"}, {'rule': "grad_acc"}, {'skip_quiescent': True}])
+@pytest.mark.parametrize("spike_cache", [None, "memory"])
+@pytest.mark.parametrize("compact_state", [None, "float32", "float16"])
+def test_options_train(make_config, data, compact_state, spike_cache, mode):
+	# a few samples of every combination of the state, spike and training options
+	config = make_config(n_train=8, n_test=8, compact_state=compact_state, spike_cache=spike_cache, **mode)
+	Acc, records = train(config, data)
+	assert np.all((Acc >= 0) & (Acc <= 1))
+
+
+@pytest.mark.parametrize("overrides", [{}, {'gate': "decay", 'meta': None}, {'meta': "layer"}])
+def test_skip_quiescent_matches_stepping(make_config, data, overrides):
+	# sparse images, with long stretches without input spikes
+	sparse = tuple(images*0.1 if k % 2 == 0 else images for k, images in enumerate(data))
+	runs = [train(make_config(skip_quiescent=skip, record=("weights", "updates"), **overrides), sparse) for skip in (False, True)]
+	assert_same_run(*runs)
+
+
+@pytest.mark.parametrize("overrides", [{}, {'gate': "shuffled"}, {'gate': "decay", 'meta': None, 'gate_rng': "philox"}])
+def test_rng_streams_independent_of_run_order(make_config, data, overrides):
+	config = make_config(rng_streams=True, record=("weights", "updates"), **overrides)
+	# run 1 alone, and after run 0 from the same global random state
+	alone = train(config, data, run=1, seed=5)
+	np.random.seed(1)
+	first = probmeta.train_run(0, config, data, probmeta.device_setup(config))
+	after = probmeta.train_run(1, config, data, probmeta.device_setup(config))
+	assert_same_run(alone, after)
+	assert_same_run(first, train(config, data, run=0, seed=7))
+	assert not np.array_equal(first[1]['w_in_rec'], after[1]['w_in_rec'])